@@ -19,10 +19,10 @@
     ],
     "images": [],
     "demo": [],
-    "qweb": [
-        "static/src/components/*.xml",
-    ],
     "data": [
+        "security/ir.model.access.csv",
+        "data/ir_actions_server.xml",
+        "data/ir_cron.xml",
         "views/assets.xml",
         "views/product_templates.xml",
         "views/website_sale_templates.xml",
@@ -1,6 +1,21 @@
 import datetime
+import hashlib
+import json
+
+from werkzeug.exceptions import BadRequest, NotFound
+from odoo import fields
+from odoo.http import Controller, Response, route, request
+from odoo.addons.website_rentals.helpers.instrumentation import instrumented
+
+# Maximum number of periods returned by the next_available route
+MAX_NEXT_AVAILABLE = 10
+
+# Maximum number of periods priced by a single get_prices request
+MAX_PRICE_PERIODS = 100
+
+# Seconds that browsers and proxies may reuse a product profile without revalidating it
+PRODUCT_PROFILE_MAX_AGE = 300
 
-from odoo.http import Controller, route, request
 
 class WebsiteRentalController(Controller):
     @route(
@@ -11,11 +26,13 @@ class WebsiteRentalController(Controller):
         website=True,
         csrf=False
     )
+    @instrumented
     def can_rent(self, product_id, start_date, stop_date, qty=None):
+        context = self._get_scheduling_context()
         return request.env["product.product"]\
             .sudo()\
             .browse(product_id)\
-            .can_rent(start_date, stop_date, qty=qty)
+            .can_rent(context.to_utc(start_date), context.to_utc(stop_date), qty=qty)
 
     @route(
         ["/website/rentals/get_product"],
@@ -25,14 +42,49 @@ class WebsiteRentalController(Controller):
         website=True,
         csrf=False
     )
+    @instrumented
     def get_product(self, product_id):
-        return request.env["product.product"]\
-            .sudo()\
-            .search_read(
-                [("id", "=", product_id)],
-                fields=("id", "name", "display_name", "description_sale", "preparation_time"),
-                limit=1,
-            )
+        product = request.env["product.product"].sudo().browse(product_id).exists()
+        if not product:
+            return []
+
+        return [request.env["website.rentals.scheduling"].sudo().get_product_profile(product)]
+
+    @route(
+        ["/website/rentals/product/<int:product_id>"],
+        type="http",
+        auth="public",
+        methods=["GET"],
+        website=True,
+        sitemap=False,
+    )
+    @instrumented
+    def product_profile(self, product_id, lang=None):
+        """
+        Rental profile of a product as JSON, see SchedulingHelper.get_product_profile().
+        Unlike get_product this can be cached by browsers and proxies, the
+        profile is identified by an ETag so that unchanged profiles only
+        have to be revalidated.
+        """
+        env = request.env
+        if lang and env["res.lang"]._lang_get(lang):
+            env = env(context=dict(env.context, lang=lang))
+
+        product = env["product.product"].sudo().browse(product_id).exists()
+        if not product:
+            raise NotFound()
+
+        body = json.dumps(env["website.rentals.scheduling"].sudo().get_product_profile(product), sort_keys=True)
+        etag = hashlib.sha1(body.encode()).hexdigest()
+        headers = [
+            ("ETag", f'"{etag}"'),
+            ("Cache-Control", f"{'public' if request.env.user._is_public() else 'private'}, max-age={PRODUCT_PROFILE_MAX_AGE}"),
+        ]
+
+        if request.httprequest.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+
+        return request.make_response(body, headers=headers + [("Content-Type", "application/json")])
 
     @route(
         ["/website/rentals/get_available_rental_qty"],
@@ -42,11 +94,30 @@ class WebsiteRentalController(Controller):
         website=True,
         csrf=False
     )
+    @instrumented
     def get_available_rental_qty(self, product_id, start_date, stop_date):
+        context = self._get_scheduling_context()
         return request.env["product.product"]\
             .sudo()\
             .browse(product_id)\
-            .get_available_rental_qty(start_date, stop_date)
+            .get_available_rental_qty(context.to_utc(start_date), context.to_utc(stop_date))
+
+    @route(
+        ["/website/rentals/get_available_rental_qtys"],
+        type="json",
+        auth="public",
+        methods=["POST"],
+        website=True,
+        csrf=False
+    )
+    @instrumented
+    def get_available_rental_qtys(self, product_ids, start_date, stop_date):
+        """Available quantities of many products for a single time period, keyed by product id."""
+        context = self._get_scheduling_context()
+        return request.env["product.product"]\
+            .sudo()\
+            .browse(product_ids)\
+            .get_available_rental_qtys(context.to_utc(start_date), context.to_utc(stop_date))
 
     @route(
         ["/website/rentals/get_rental_hourly_timeslots"],
@@ -56,17 +127,59 @@ class WebsiteRentalController(Controller):
         website=True,
         csrf=False
     )
-    def get_rental_hourly_timeslots(self, product_id, start_date, stop_date, quantity=0, include_start=True, include_stop=True):
-        timezone = request.httprequest.cookies.get('tz')
+    @instrumented
+    def get_rental_hourly_timeslots(self, product_id, start_date, stop_date, quantity=0, include_start=True, include_stop=True, with_quantities=False):
+        timezone = self._get_scheduling_context()
         # Add space between date and time for the start time we get from the js side
         if len(start_date) == 15:
             start_date = start_date[:10] + " " + start_date[10:]
         timeslots = request.env["product.product"]\
             .sudo()\
             .browse(product_id)\
-            .get_rental_hourly_timeslots(start_date, stop_date, quantity, include_start, include_stop, timezone)
+            .get_rental_hourly_timeslots(start_date, stop_date, quantity, include_start, include_stop, timezone, with_quantities)
         return timeslots
 
+    @route(
+        ["/website/rentals/availability_calendar"],
+        type="json",
+        auth="public",
+        methods=["POST"],
+        website=True,
+        csrf=False
+    )
+    @instrumented
+    def availability_calendar(self, product_id, start_date, stop_date, quantity=1):
+        timezone = self._get_scheduling_context()
+        return request.env["product.product"]\
+            .sudo()\
+            .browse(product_id)\
+            .get_rental_availability_calendar(start_date, stop_date, quantity, timezone)
+
+    @route(
+        ["/website/rentals/next_available"],
+        type="json",
+        auth="public",
+        methods=["POST"],
+        website=True,
+        csrf=False
+    )
+    @instrumented
+    def next_available(self, product_id, duration, quantity=1, after=None, limit=1):
+        """
+        Earliest periods of a duration in hours in which a product can be
+        rented, as a list of {"start": ..., "stop": ...} local datetimes.
+        """
+        timezone = self._get_scheduling_context()
+        periods = request.env["product.product"]\
+            .sudo()\
+            .browse(product_id)\
+            .find_next_available_rental(float(duration), float(quantity or 0), after, min(int(limit), MAX_NEXT_AVAILABLE), timezone)
+
+        return [
+            {"start": fields.Datetime.to_string(start), "stop": fields.Datetime.to_string(stop)}
+            for start, stop in periods
+        ]
+
     @route(
         ["/website/rentals/get_price"],
         type="json",
@@ -75,17 +188,71 @@ class WebsiteRentalController(Controller):
         website=True,
         csrf=False
     )
+    @instrumented
     def get_price(self, product_id, start_date, stop_date, qty):
+        return self._get_price(product_id, start_date, stop_date, qty)
+
+    @route(
+        ["/website/rentals/quote"],
+        type="json",
+        auth="public",
+        methods=["POST"],
+        website=True,
+        csrf=False
+    )
+    @instrumented
+    def quote(self, product_id, start_date, stop_date, quantity=1, start_slot=None, stop_slot=None, with_quantities=False):
+        """
+        Combines the available quantity, timeslots, price and can_rent check of
+        a product for a date range in a single call. The price is only set
+        when both a start and stop slot are selected. See get_quote() for
+        with_quantities.
+        """
+        timezone = self._get_scheduling_context()
+        product = request.env["product.product"].sudo().browse(product_id)
+        quantity = float(quantity or 0)
+
+        quote = product.get_rental_quote(start_date, stop_date, quantity, start_slot, stop_slot, timezone, with_quantities)
+        quote["price"] = False
+        if start_slot and stop_slot and quantity:
+            quote["price"] = self._get_price(product.id, start_slot, stop_slot, quantity)
+
+        return quote
+
+    @route(
+        ["/website/rentals/get_prices"],
+        type="json",
+        auth="public",
+        methods=["POST"],
+        website=True,
+        csrf=False
+    )
+    @instrumented
+    def get_prices(self, product_id, periods):
+        """
+        Formatted prices for a list of [start_date, stop_date, qty] periods,
+        up to MAX_PRICE_PERIODS of them.
+        """
+        if len(periods) > MAX_PRICE_PERIODS:
+            raise BadRequest(f"At most {MAX_PRICE_PERIODS} periods can be priced at once.")
+
         currency = request.env.company.currency_id
-        wizard = request.env["rental.wizard"]\
-            .sudo()\
-            .create({
-                "product_id": product_id,
-                "pickup_date": start_date,
-                "return_date": stop_date,
-                "quantity": float(qty),
-            })
+        product = request.env["product.product"].sudo().browse(product_id)
+
+        return [
+            currency.pretty(price)
+            for price in request.env["website.rentals.pricing"].sudo().get_prices(product, periods)
+        ]
 
-        wizard._compute_unit_price()
+    def _get_scheduling_context(self):
+        """Timezone of the request for the scheduling helper, using the browser timezone of the visitor."""
+        return request.env["website.rentals.scheduling"]._get_scheduling_context(request.httprequest.cookies.get('tz'))
+
+    def _get_price(self, product_id, start_date, stop_date, qty):
+        """Formatted price for renting a quantity of a product for a time period."""
+        currency = request.env.company.currency_id
+        product = request.env["product.product"].sudo().browse(product_id)
 
-        return currency.pretty(wizard.unit_price * float(qty))
+        return currency.pretty(
+            request.env["website.rentals.pricing"].sudo().get_price(product, start_date, stop_date, qty)
+        )
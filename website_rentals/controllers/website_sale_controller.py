@@ -2,6 +2,7 @@ import json
 from odoo import http, _
 from odoo.http import request
 from odoo.exceptions import ValidationError
+from odoo.osv import expression
 from odoo.addons.website_sale.controllers.main import WebsiteSale
 from dateutil import parser
 import pytz
@@ -9,6 +10,38 @@ from datetime import timedelta
 
 
 class WebsiteSaleController(WebsiteSale):
+    def _get_search_domain(self, search, category, attrib_values, search_in_description=True):
+        """
+        Hides the rental products that are not available in the period of the
+        rental_start_date and rental_stop_date parameters of /shop, when given.
+        """
+        domain = super()._get_search_domain(search, category, attrib_values, search_in_description=search_in_description)
+
+        period = self._get_rental_period()
+        if not period:
+            return domain
+
+        templates = request.env["product.template"].sudo().search(expression.AND([domain, [("rent_ok", "=", True)]]))
+        # The days of the period are local to the visitor
+        scheduling = request.env["website.rentals.scheduling"].sudo()
+        context = scheduling._get_scheduling_context(request.httprequest.cookies.get("tz"))
+        available_templates = scheduling.get_available_templates(templates, *map(context.to_utc, period))
+
+        return expression.AND([domain, ["|", ("rent_ok", "=", False), ("id", "in", available_templates.ids)]])
+
+    def _get_rental_period(self):
+        """Period of whole days to filter the rental products of /shop on, if any."""
+        try:
+            start_date = parser.parse(request.httprequest.args.get("rental_start_date", ""))
+            stop_date = parser.parse(request.httprequest.args.get("rental_stop_date", ""))
+        except (ValueError, OverflowError):
+            return None
+
+        if stop_date < start_date:
+            return None
+
+        return start_date, stop_date + timedelta(days=1)
+
     @http.route(['/shop/confirm_order'], type='http', auth="public", website=True, sitemap=False)
     def confirm_order(self, **post):
         order = request.website.sale_get_order()
@@ -1,3 +1,11 @@
+from . import cache
+from . import context
+from . import formatting
+from . import instrumentation
 from . import misc
+from . import occupancy
+from . import occupancy_numpy
+from . import pricing
 from . import scheduling
+from . import slots
 from . import time
@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+
+
+class AvailabilityCache:
+    """
+    Process wide LRU cache for availability data, shared by all requests a
+    worker handles.
+
+    Every entry is stored along with a version. A lookup with a different
+    version is a miss, which is how entries are invalidated across workers:
+    the version of a product changes whenever one of its bookings changes.
+
+        cache.get_or_compute(key, version, lambda: expensive_lookup())
+
+    Hits and misses are counted so the cache can be verified in production.
+    """
+
+    def __init__(self, size=1024):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get_or_compute(self, key, version, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Computing can take a while, don't block other threads while doing so
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+availability_cache = AvailabilityCache()
@@ -0,0 +1,51 @@
+import datetime
+
+import dateutil.parser
+import pytz
+
+
+class SchedulingContext:
+    """
+    Timezone of a scheduling request, resolved once and passed along to
+    everything that compares local timeslots with stored dates.
+
+    Dates are stored as naive UTC datetimes while timeslots are naive local
+    datetimes. The context converts between the two and holds the current
+    local time, so that all filters of a request use the same moment.
+
+        context = SchedulingContext("Europe/Brussels")
+        context.to_local(datetime(2021, 9, 10, 6, 30))          => 2021-09-10 08:30
+        context.to_utc("2021-09-10 08:30:00")                   => 2021-09-10 06:30
+        context.to_utc("2021-09-10T06:30:00.000Z")              => 2021-09-10 06:30
+    """
+
+    def __init__(self, timezone=None):
+        self.timezone = timezone if timezone in pytz.all_timezones_set else "UTC"
+        self.tz = pytz.timezone(self.timezone)
+        self.now = self.to_local(datetime.datetime.utcnow())
+
+    def __repr__(self):
+        return f"SchedulingContext({self.timezone!r})"
+
+    def to_local(self, data):
+        """Converts a naive UTC datetime into a naive local datetime."""
+        return pytz.utc.localize(data).astimezone(self.tz).replace(tzinfo=None)
+
+    def to_utc(self, data):
+        """
+        Converts a string, date or datetime into a naive UTC datetime. Values
+        without a timezone are taken to be local.
+        """
+        if isinstance(data, str):
+            data = dateutil.parser.parse(data)
+
+        if type(data) == datetime.date:
+            data = datetime.datetime.combine(data, datetime.time.min)
+
+        if type(data) != datetime.datetime:
+            raise Exception("to_utc only accepts a string, datetime or date as a parameter.")
+
+        if data.tzinfo is None:
+            data = self.tz.localize(data)
+
+        return data.astimezone(pytz.utc).replace(tzinfo=None)
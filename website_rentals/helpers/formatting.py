@@ -0,0 +1,41 @@
+from odoo import api, models, tools
+
+
+class FormattingHelper(models.AbstractModel):
+    """Utilities for showing rental dates the way the customer expects them."""
+
+    _name = "website.rentals.formatting"
+    _description = "Formatting Utilities"
+
+    def format_datetime(self, value, lang_code=None):
+        """
+        Formats a datetime with the date and time format of a language, by
+        default the language of the user or else of the administrator. The
+        value is formatted as is, without converting it to a timezone.
+
+            format_datetime(datetime(2022, 3, 14, 8, 30), "de_DE")   => 14.03.2022 08:30:00
+        """
+        return self.format_datetimes([value], lang_code)[0]
+
+    def format_datetimes(self, values, lang_code=None):
+        """Bulk version of format_datetime(), empty values are formatted as False."""
+        datetime_format = self._get_datetime_format(lang_code or self._get_lang_code())
+
+        return [value.replace(tzinfo=None).strftime(datetime_format) if value else False for value in values]
+
+    def _get_lang_code(self):
+        """Language of the user, falling back on the language of the administrator."""
+        return self.env.user.lang or self.env.ref("base.user_admin").sudo().lang
+
+    @api.model
+    @tools.ormcache("lang_code")
+    def _get_datetime_format(self, lang_code):
+        """
+        Combined date and time format of a language. The format is cached per
+        worker, changing a language clears the cache.
+        """
+        lang = self.env["res.lang"]._lang_get(lang_code)
+        if not lang:
+            return tools.DEFAULT_SERVER_DATETIME_FORMAT
+
+        return f"{lang.date_format} {lang.time_format}"
@@ -0,0 +1,115 @@
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from odoo.http import request
+from odoo.tools import str2bool
+
+_logger = logging.getLogger(__name__)
+
+# Number of recent calls per route that percentiles are computed over
+SAMPLE_SIZE = 1000
+
+# A summary of a route is logged every this many calls
+SUMMARY_INTERVAL = 100
+
+_samples = defaultdict(lambda: deque(maxlen=SAMPLE_SIZE))
+_call_counts = defaultdict(int)
+_lock = threading.Lock()
+_current = threading.local()
+
+
+def count_records(count):
+    """Adds to the number of records fetched by the instrumented call running in this thread."""
+    if getattr(_current, "records", None) is not None:
+        _current.records += count
+
+
+def is_enabled(env):
+    """Instrumentation is enabled with the system parameter website_rentals.instrumentation."""
+    return str2bool(env["ir.config_parameter"].sudo().get_param("website_rentals.instrumentation", "False"), default=False)
+
+
+def instrumented(func):
+    """
+    Records the latency, SQL query count and number of records fetched by the
+    scheduling helper for every call of a route, when enabled.
+
+        @route(["/website/rentals/can_rent"], type="json", auth="public")
+        @instrumented
+        def can_rent(self, product_id, ...):
+            ...
+
+    Every call is logged with its product, and a summary with percentiles is
+    logged every SUMMARY_INTERVAL calls of a route.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not is_enabled(request.env):
+            return func(self, *args, **kwargs)
+
+        route = request.httprequest.path
+        queries = request.env.cr.sql_log_count
+        started = time.perf_counter()
+        _current.records = 0
+
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            sample = {
+                "seconds": time.perf_counter() - started,
+                "queries": request.env.cr.sql_log_count - queries,
+                "records": _current.records,
+            }
+            _current.records = None
+            _record(route, kwargs.get("product_id"), sample)
+
+    return wrapper
+
+
+def _record(route, product_id, sample):
+    _logger.info(
+        "route=%s product=%s seconds=%.4f queries=%d records=%d",
+        route, product_id, sample["seconds"], sample["queries"], sample["records"],
+    )
+
+    with _lock:
+        _samples[route].append(sample)
+        _call_counts[route] += 1
+        log_summary = _call_counts[route] % SUMMARY_INTERVAL == 0
+
+    if log_summary:
+        summary = get_statistics()[route]
+        _logger.info(
+            "route=%s calls=%d seconds_p50=%.4f seconds_p90=%.4f seconds_p99=%.4f queries_p50=%d queries_p99=%d records_p99=%d",
+            route, summary["calls"],
+            summary["seconds"]["p50"], summary["seconds"]["p90"], summary["seconds"]["p99"],
+            summary["queries"]["p50"], summary["queries"]["p99"], summary["records"]["p99"],
+        )
+
+
+def _percentiles(values):
+    values = sorted(values)
+    return {
+        f"p{percentile}": values[min(len(values) - 1, len(values) * percentile // 100)]
+        for percentile in (50, 90, 99)
+    }
+
+
+def get_statistics():
+    """Percentiles of the recent calls of every instrumented route in this worker."""
+    with _lock:
+        samples = {route: list(route_samples) for route, route_samples in _samples.items()}
+        call_counts = dict(_call_counts)
+
+    return {
+        route: {
+            "calls": call_counts[route],
+            "seconds": _percentiles([sample["seconds"] for sample in route_samples]),
+            "queries": _percentiles([sample["queries"] for sample in route_samples]),
+            "records": _percentiles([sample["records"] for sample in route_samples]),
+        }
+        for route, route_samples in samples.items()
+    }
@@ -0,0 +1,209 @@
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+
+class OccupancyTimeline:
+    """
+    Step function of the number of units reserved over time.
+
+    The reservations are converted once into sorted interval endpoints, after
+    which the peak number of concurrently reserved units over any window can be
+    answered without going through the reservations again.
+
+        timeline = OccupancyTimeline([(8, 12, 1), (10, 14, 2)])
+        timeline.peak(9, 11)        => 3
+        timeline.peak(12, 16)       => 2
+        timeline.reserved(12, 16)   => 3
+
+    Any ordered type can be used for the endpoints, in practice these are
+    naive datetimes.
+    """
+
+    def __init__(self, intervals):
+        intervals = [(start, stop, qty) for start, stop, qty in intervals if qty and start <= stop]
+
+        deltas = {}
+        for start, stop, qty in intervals:
+            if stop == start:
+                continue
+            deltas[start] = deltas.get(start, 0) + qty
+            deltas[stop] = deltas.get(stop, 0) - qty
+
+        # levels[i] is the number of units reserved from points[i] up to points[i + 1]
+        self.points = sorted(deltas)
+        self.levels = []
+        level = 0
+        for point in self.points:
+            level += deltas[point]
+            self.levels.append(level)
+
+        # Running totals of the reserved units ordered by start and by stop
+        by_start = sorted((start, qty) for start, stop, qty in intervals)
+        by_stop = sorted((stop, qty) for start, stop, qty in intervals)
+        self._starts = [start for start, qty in by_start]
+        self._started_totals = list(accumulate(qty for start, qty in by_start))
+        self._stops = [stop for stop, qty in by_stop]
+        self._stopped_totals = list(accumulate(qty for stop, qty in by_stop))
+
+        self._max_table = None
+
+    def level_at(self, moment):
+        """Number of units reserved at a given moment."""
+        index = bisect_right(self.points, moment) - 1
+        return self.levels[index] if index >= 0 else 0
+
+    def peak(self, start, stop):
+        """
+        Peak number of concurrently reserved units over the window [start, stop).
+        An empty window is treated as the single moment at start.
+        """
+        if stop <= start:
+            return self.level_at(start)
+
+        first = bisect_right(self.points, start) - 1
+        last = bisect_left(self.points, stop)
+
+        if first < 0:
+            # the window starts before the first reservation, nothing is reserved there
+            return max(0, self._range_max(0, last))
+
+        return self._range_max(first, last)
+
+    def peaks(self, windows):
+        """Peak reserved units for each (start, stop) window, see peak()."""
+        return [self.peak(start, stop) for start, stop in windows]
+
+    def reserved(self, start, stop):
+        """
+        Total units of all reservations overlapping [start, stop], including
+        reservations that only touch its edges. Unlike peak(), this adds up
+        reservations that are never out at the same time. An inverted window
+        is treated as the single moment at start.
+        """
+        stop = max(start, stop)
+        started = bisect_right(self._starts, stop)
+        stopped = bisect_left(self._stops, start)
+
+        # Reservations that stopped before the window have also started before it
+        return (
+            (self._started_totals[started - 1] if started else 0)
+            - (self._stopped_totals[stopped - 1] if stopped else 0)
+        )
+
+    def _range_max(self, first, last):
+        """Maximum of levels[first:last] using a sparse table built on first use."""
+        if last <= first:
+            return 0
+
+        if self._max_table is None:
+            self._max_table = [self.levels]
+            width = 1
+            while width * 2 <= len(self.levels):
+                previous = self._max_table[-1]
+                self._max_table.append([
+                    max(previous[i], previous[i + width])
+                    for i in range(len(previous) - width)
+                ])
+                width *= 2
+
+        row = (last - first).bit_length() - 1
+        table = self._max_table[row]
+        return max(table[first], table[last - (1 << row)])
+
+
+class HourlyOccupancyMixin:
+    """
+    Timeline built from the precomputed occupancy per hour, given as
+    (hour, reserved units) pairs.
+
+    The individual reservations are not known, so reserved() is the highest
+    occupancy of the hours touching the window instead of the total of the
+    reservations overlapping it.
+    """
+
+    def __init__(self, hours, step):
+        super().__init__([(hour, hour + step, qty) for hour, qty in hours])
+
+    def reserved(self, start, stop):
+        return max(self.peak(start, stop), self.level_at(stop))
+
+
+class HourlyOccupancyTimeline(HourlyOccupancyMixin, OccupancyTimeline):
+    pass
+
+
+class ReservationIndex(OccupancyTimeline):
+    """
+    Occupancy timeline that also keeps the reservations themselves, given as
+    (start, stop, quantity, id) tuples, so that it can answer which
+    reservations overlap a period.
+
+        index = ReservationIndex([(8, 12, 1, 1), (10, 14, 2, 2)])
+        index.overlapping(12, 16)               => [1, 2]
+        index.peak(9, 11)                       => 3
+
+    The overlap queries use a centered interval tree built on first use.
+    """
+
+    def __init__(self, reservations):
+        self.reservations = {
+            id_: (start, stop, qty) for start, stop, qty, id_ in reservations if start <= stop
+        }
+        super().__init__(self.reservations.values())
+        self._tree = None
+
+    def overlapping(self, start, stop):
+        """
+        Ids of the reservations overlapping [start, stop], including the ones
+        that only touch its edges, in the order they start.
+        """
+        if self._tree is None:
+            self._tree = self._build_tree(
+                [(start, stop, id_) for id_, (start, stop, qty) in self.reservations.items()]
+            )
+
+        ids = []
+        nodes = [self._tree]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+
+            center, by_start, by_stop, left, right = node
+            if stop < center:
+                # Everything in the node ends at or after the center, so only the start matters
+                ids.extend(id_ for interval_start, id_ in by_start[:bisect_right(by_start, (stop, float("inf")))])
+                nodes.append(left)
+            elif start > center:
+                ids.extend(id_ for interval_stop, id_ in by_stop[bisect_left(by_stop, (start, float("-inf"))):])
+                nodes.append(right)
+            else:
+                ids.extend(id_ for interval_start, id_ in by_start)
+                nodes.extend((left, right))
+
+        return sorted(ids, key=lambda id_: (self.reservations[id_][0], id_))
+
+    @staticmethod
+    def _build_tree(intervals):
+        """
+        Centered interval tree of (start, stop, id) intervals. Every node is a
+        (center, intervals by start, intervals by stop, left, right) tuple,
+        holding the intervals that contain its center.
+        """
+        if not intervals:
+            return None
+
+        endpoints = sorted(endpoint for start, stop, id_ in intervals for endpoint in (start, stop))
+        center = endpoints[len(endpoints) // 2]
+
+        left = [interval for interval in intervals if interval[1] < center]
+        right = [interval for interval in intervals if interval[0] > center]
+        middle = [interval for interval in intervals if interval[0] <= center <= interval[1]]
+
+        return (
+            center,
+            sorted((start, id_) for start, stop, id_ in middle),
+            sorted((stop, id_) for start, stop, id_ in middle),
+            ReservationIndex._build_tree(left),
+            ReservationIndex._build_tree(right),
+        )
@@ -0,0 +1,139 @@
+import logging
+from odoo.addons.website_rentals.helpers.occupancy import HourlyOccupancyMixin
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+    _logger.debug("numpy is not installed, the numpy timeline engine is not available.")
+
+
+class NumpyOccupancyTimeline:
+    """
+    Vectorized version of OccupancyTimeline, giving identical results.
+
+    The reservations are loaded into arrays once. Levels are the cumulative
+    sum of the sorted endpoint deltas and windows are located with
+    searchsorted, so peaks() and reserved() handle all windows at once
+    instead of one by one.
+    """
+
+    def __init__(self, intervals):
+        intervals = [(start, stop, qty) for start, stop, qty in intervals if qty and start <= stop]
+
+        starts = self._to_array([start for start, stop, qty in intervals])
+        stops = self._to_array([stop for start, stop, qty in intervals])
+        qtys = numpy.array([qty for start, stop, qty in intervals], dtype=float)
+
+        # Interleave the start and stop of every interval so that deltas on the
+        # same point are added up in the same order as OccupancyTimeline does
+        timed = starts != stops
+        endpoints = numpy.column_stack((starts[timed], stops[timed])).ravel()
+        deltas = numpy.column_stack((qtys[timed], -qtys[timed])).ravel()
+
+        self.points, inverse = numpy.unique(endpoints, return_inverse=True)
+        point_deltas = numpy.zeros(len(self.points))
+        numpy.add.at(point_deltas, inverse, deltas)
+        self.levels = numpy.cumsum(point_deltas)
+
+        # Sorted by endpoint and then quantity, like the running totals of OccupancyTimeline
+        by_start = numpy.lexsort((qtys, starts))
+        by_stop = numpy.lexsort((qtys, stops))
+        self._starts = starts[by_start]
+        self._started_totals = numpy.cumsum(qtys[by_start])
+        self._stops = stops[by_stop]
+        self._stopped_totals = numpy.cumsum(qtys[by_stop])
+
+        self._max_table = self._build_max_table(self.levels)
+
+    def level_at(self, moment):
+        return self.levels_at([moment])[0]
+
+    def levels_at(self, moments):
+        index = numpy.searchsorted(self.points, self._to_array(moments), side="right") - 1
+        return numpy.where(index >= 0, self._take(self.levels, index), 0.0).tolist()
+
+    def peak(self, start, stop):
+        return self.peaks([(start, stop)])[0]
+
+    def peaks(self, windows):
+        if not windows:
+            return []
+
+        starts = self._to_array([start for start, stop in windows])
+        stops = self._to_array([stop for start, stop in windows])
+
+        first = numpy.searchsorted(self.points, starts, side="right") - 1
+        last = numpy.searchsorted(self.points, stops, side="left")
+
+        # An empty window is the single moment at its start
+        empty = stops <= starts
+        at_start = numpy.where(first >= 0, self._take(self.levels, first), 0.0)
+
+        peaks = self._range_max(numpy.maximum(first, 0), last)
+        peaks = numpy.where(first < 0, numpy.maximum(peaks, 0.0), peaks)
+
+        return numpy.where(empty, at_start, peaks).tolist()
+
+    def reserved(self, start, stop):
+        stop = max(start, stop)
+        started = numpy.searchsorted(self._starts, self._to_array([stop]), side="right")[0]
+        stopped = numpy.searchsorted(self._stops, self._to_array([start]), side="left")[0]
+
+        return (
+            (self._started_totals[started - 1].item() if started else 0)
+            - (self._stopped_totals[stopped - 1].item() if stopped else 0)
+        )
+
+    def _range_max(self, first, last):
+        """Maximum of levels[first:last] for arrays of bounds, 0 for empty ranges."""
+        valid = last > first
+        length = numpy.where(valid, last - first, 1)
+        first = numpy.where(valid, first, 0)
+
+        if not len(self.levels):
+            return numpy.zeros(len(first))
+
+        row = numpy.floor(numpy.log2(length)).astype(int)
+        table = self._max_table
+        peaks = numpy.maximum(
+            table[row, first],
+            table[row, numpy.maximum(first + length - (1 << row), 0)],
+        )
+
+        return numpy.where(valid, peaks, 0.0)
+
+    @staticmethod
+    def _build_max_table(levels):
+        """Sparse table of levels, row k holds the maxima of 2 ** k consecutive levels."""
+        rows = [levels]
+        width = 1
+        while width * 2 <= len(levels):
+            previous = rows[-1]
+            row = numpy.zeros(len(levels))
+            row[:len(levels) - width * 2 + 1] = numpy.maximum(previous[:len(levels) - width * 2 + 1], previous[width:len(levels) - width + 1])
+            rows.append(row)
+            width *= 2
+
+        return numpy.vstack(rows) if len(levels) else numpy.zeros((1, 0))
+
+    @staticmethod
+    def _take(values, index):
+        """values[index] for an array of indexes that may be out of bounds, those give 0."""
+        if not len(values):
+            return numpy.zeros(len(index))
+        return values[numpy.clip(index, 0, len(values) - 1)]
+
+    @staticmethod
+    def _to_array(values):
+        """Datetimes as numpy datetimes, anything else (e.g. numbers) as is."""
+        values = numpy.array(values)
+        if values.dtype == object:
+            values = values.astype("datetime64[us]")
+        return values
+
+
+class NumpyHourlyOccupancyTimeline(HourlyOccupancyMixin, NumpyOccupancyTimeline):
+    pass
@@ -0,0 +1,51 @@
+from odoo import fields, models
+from odoo.addons.website_rentals.helpers.time import parse_datetime
+
+
+class PricingHelper(models.AbstractModel):
+    """Utilities for computing rental prices without creating any records."""
+
+    _name = "website.rentals.pricing"
+    _description = "Pricing Utilities"
+
+    def get_price(self, product, start_date, stop_date, qty=1):
+        """
+        Price for renting a quantity of a product for a time period.
+
+        This gives the same price as the rental wizard of sale_renting, using
+        the best rental pricing rule of the product including the extra hourly
+        and daily prices, but without creating a wizard for it.
+        """
+        return self._get_unit_price(product, parse_datetime(start_date), parse_datetime(stop_date)) * float(qty)
+
+    def get_prices(self, product, periods):
+        """
+        Prices for a list of (start_date, stop_date, qty) periods, e.g. to
+        show a grid of prices.
+
+            get_prices(product, [("2021-09-10 08:00", "2021-09-10 12:00", 1), ...])   => [20.0, ...]
+        """
+        return [self.get_price(product, start_date, stop_date, qty) for start_date, stop_date, qty in periods]
+
+    def _get_unit_price(self, product, start_date, stop_date):
+        """Price of a single unit, in the currency of the current company."""
+        company = self.env.company
+        currency = company.currency_id
+
+        pricing = product._get_best_pricing_rule(
+            pickup_date=start_date,
+            return_date=stop_date,
+            company=company,
+            currency=currency,
+        )
+
+        if not pricing:
+            return product.lst_price
+
+        duration = self.env["rental.pricing"]._compute_duration_vals(start_date, stop_date)[pricing.unit]
+        price = pricing._compute_price(duration, pricing.unit)
+
+        if pricing.currency_id != currency:
+            price = pricing.currency_id._convert(price, currency, company, fields.Date.today())
+
+        return price
@@ -1,35 +1,71 @@
+import logging
+from collections import defaultdict, namedtuple
 from datetime import datetime, timedelta
 
-import pytz
-from odoo import fields, models
-from odoo.addons.website_rentals.helpers.misc import float_range
-from odoo.addons.website_rentals.helpers.time import parse_datetime, float_to_time
+from odoo import models
+from odoo.tools import str2bool
+from odoo.addons.website_rentals.helpers import instrumentation
+from odoo.addons.website_rentals.helpers.cache import availability_cache
+from odoo.addons.website_rentals.helpers.context import SchedulingContext
+from odoo.addons.website_rentals.helpers import occupancy_numpy, slots
+from odoo.addons.website_rentals.helpers.occupancy import HourlyOccupancyTimeline, OccupancyTimeline, ReservationIndex
+from odoo.addons.website_rentals.helpers.time import parse_datetime
 
 
-def _filter_preparation_time(date, cutoff):
-    """Creates a filter function for dates that don't meet a cutoff time."""
+_logger = logging.getLogger(__name__)
 
-    def _filter(time):
-        return date.replace(hour=float_to_time(time)["hours"], minute=float_to_time(time)["minutes"]) >= cutoff
+# Timeline classes for the reservations and for the precomputed hourly occupancy, per engine
+TIMELINE_ENGINES = {
+    "python": (OccupancyTimeline, HourlyOccupancyTimeline),
+    "numpy": (occupancy_numpy.NumpyOccupancyTimeline, occupancy_numpy.NumpyHourlyOccupancyTimeline),
+}
 
-    return _filter
+# Pricing rule values used for generating timeslots, see SchedulingHelper.get_product_profile()
+PriceRule = namedtuple("PriceRule", ["id", "duration", "unit", "price", "start_time", "end_time"])
 
+# Maximum number of days returned by a single availability calendar request
+MAX_CALENDAR_DAYS = 92
 
-def _filter_after_now(date):
-    """Creates a filter function for timeslot days that are before the current time."""
-    return _filter_preparation_time(date, datetime.now())
+# Number of days ahead that are searched for the next available periods
+MAX_SEARCH_DAYS = 366
 
 
-def _format_timeslot_time(time):
+# Minutes between timeslots
+SLOT_STEP = 60
+
+
+def _cutoff_minutes(date, cutoff):
+    """
+    First minute after midnight on the day of date whose timeslot is not
+    before a cutoff datetime. Negative when the cutoff is on an earlier day.
     """
-    Formats a floating point time as a string for display.
+    seconds = (cutoff - date.replace(hour=0, minute=0)).total_seconds()
+    return -int(-seconds // 60)
+
+
+def _reserved_qty(reservation):
+    """Units still reserved by an order line or its values, returned units are free again."""
+    return max(0, reservation["product_uom_qty"] - (reservation["qty_returned"] or 0))
+
 
-        self._format_timeslot_time(6.5)   => 06:30
-        self._format_timeslot_time(7.75)  => 07:45
+def _start_of_day(date):
+    """Midnight at the start of the day of a datetime."""
+    return datetime.combine(date.date(), datetime.min.time())
+
+
+def _timeslot_datetime(date, time):
+    """Combines the day of a datetime with a time in minutes after midnight, e.g. 810 for 13:30."""
+    return _start_of_day(date) + timedelta(minutes=time)
+
+
+def _format_timeslot_time(time):
     """
-    time = float_to_time(time)
+    Formats a time in minutes after midnight as a string for display.
 
-    return f"{time['hours']:02}:{time['minutes']:02}"
+        self._format_timeslot_time(390)   => 06:30
+        self._format_timeslot_time(465)   => 07:45
+    """
+    return f"{time // 60:02}:{time % 60:02}"
 
 
 class SchedulingHelper(models.AbstractModel):
@@ -49,16 +85,76 @@ class SchedulingHelper(models.AbstractModel):
         are picked up then the product can be rented.
         Non stockable type products have no capacity by default and can always
         be booked.
+
+        Dates are naive UTC, like the dates stored on order lines. Callers
+        with local dates convert them first, see SchedulingContext.to_utc().
+        A period that stops before it starts can never be rented.
         """
 
+        if parse_datetime(stop_date) < parse_datetime(start_date):
+            return False
+
         if product.type != "product":
             return True
 
         if not product.rent_ok:
             return False
 
+        return self._can_rent(product, start_date, self.get_available_qty(product, start_date, stop_date), qty)
+
+    def get_unavailable_lines(self, order_lines):
+        """
+        Bulk version of can_rent() for rental order lines, returning the lines
+        that cannot be rented. Every line is checked for the total quantity
+        ordered of its product over all of the given lines.
+
+        Lines are grouped by availability pool, the reservations of a pool are
+        fetched once and checked against every line and period in it.
+        """
+        quantities = defaultdict(float)
+        for line in order_lines:
+            quantities[line.product_id] += line.product_uom_qty
+
+        unavailable = self.env["sale.order.line"]
+        pools = defaultdict(lambda: self.env["sale.order.line"])
+        for line in order_lines:
+            if line.pickup_date and line.return_date and line.return_date < line.pickup_date:
+                unavailable |= line
+                continue
+
+            if line.product_id.type != "product":
+                continue
+
+            if not line.product_id.rent_ok:
+                unavailable |= line
+                continue
+
+            pools[self._get_pool_products(line.product_id)] |= line
+
+        for pool_lines in pools.values():
+            product = pool_lines[0].product_id
+            total_units = self._get_total_units(product)
+            timeline = self._get_occupancy_timeline(
+                product,
+                min(pool_lines.mapped("pickup_date")),
+                max(pool_lines.mapped("return_date")),
+            )
+
+            for line in pool_lines:
+                available_qty = max(0, total_units - timeline.reserved(line.pickup_date, line.return_date))
+                if not self._can_rent(line.product_id, line.pickup_date, available_qty, quantities[line.product_id]):
+                    unavailable |= line
+
+        return order_lines.filtered(lambda line: line in unavailable)
+
+    def _can_rent(self, product, start_date, available_qty, qty=None):
+        """
+        Checks a stockable rental product's available quantity against the
+        ordered quantity, and the start date in UTC against its preparation
+        time.
+        """
         return (
-                self.get_available_qty(product, start_date, stop_date) >= (qty or 0)
+                available_qty >= (qty or 0)
                 and parse_datetime(start_date) >= datetime.now() + timedelta(hours=product.preparation_time or 0)
         )
 
@@ -70,46 +166,162 @@ class SchedulingHelper(models.AbstractModel):
         perfect solution because if a customer is renting something 6 months
         from now we cannot predict what the on hand quantity is going to be, so
         making an assumption based on what product is currently in the system.
+
+        Dates are naive UTC, see can_rent(). Nothing is available in a period
+        that stops before it starts.
         """
+        start_date = parse_datetime(start_date)
+        stop_date = parse_datetime(stop_date)
 
-        overlapping_reservations = self.get_overlapping_reservations(product, start_date, stop_date)
-        # Get total units for the product (or product template if the setting rental_check_availability_on_all_products is True)
-        if product.product_tmpl_id.rental_check_availability_on_all_products:
-            total_units = product.product_tmpl_id.qty_in_rent + product.product_tmpl_id.qty_available
+        if stop_date < start_date:
+            return 0
+
+        if self._use_occupancy_table():
+            reserved_qty = self._get_occupancy_timeline(product, start_date, stop_date).reserved(start_date, stop_date)
         else:
-            total_units = product.qty_in_rent + product.qty_available
+            index = self._get_reservation_index(product, start_date)
+            if index is not None:
+                reserved_qty = index.reserved(start_date, stop_date)
+            else:
+                reserved_qty = sum(self._get_reserved_qty(self._get_pool_products(product), start_date, stop_date).values())
 
-        return max(0, total_units - sum(overlapping_reservations.mapped("product_uom_qty")))
+        total_units = self._get_total_units(product)
 
-    def get_overlapping_reservations(self, product, start_date, stop_date):
-        """Returns order lines that are confirmed for a given product and time period."""
+        return max(0, total_units - reserved_qty)
+
+    def get_available_qtys(self, products, start_date, stop_date):
+        """
+        Bulk version of get_available_qty() for many products and a single
+        time period, keyed by product id. The reservations of all products
+        are summed by a single grouped query, products that share their
+        availability pool also share the reserved quantity of the pool.
+        """
+        if not products:
+            return {}
+
+        start_date = parse_datetime(start_date)
+        stop_date = parse_datetime(stop_date)
+
+        if stop_date < start_date:
+            return {product.id: 0 for product in products}
+
+        pools = {product: self._get_pool_products(product) for product in products}
+        reserved_qty = self._get_reserved_qty(self.env["product.product"].union(*pools.values()), start_date, stop_date)
+
+        return {
+            product.id: max(0, self._get_total_units(product) - sum(reserved_qty.get(pool_product.id, 0) for pool_product in pool))
+            for product, pool in pools.items()
+        }
+
+    def get_available_templates(self, templates, start_date, stop_date):
+        """
+        Rental product templates that can be rented in a time period, as used
+        by the availability filter of the shop. Products that aren't stockable
+        can always be rented, like in can_rent(), the others need a variant
+        with a unit available.
+        """
+        templates = templates.filtered("rent_ok")
+        stockable_templates = templates.filtered(lambda template: template.type == "product")
+        available_qtys = self.get_available_qtys(stockable_templates.product_variant_ids, start_date, stop_date)
+
+        return templates.filtered(
+            lambda template: template.type != "product"
+            or any(available_qtys[product.id] > 0 for product in template.product_variant_ids)
+        )
+
+    def _get_reserved_qty(self, products, start_date, stop_date):
+        """
+        Reserved quantity per product for a time period, keyed by product id.
+        The overlap check and the sum are done by the database in a single
+        grouped query over all products.
+        """
+        start_date = parse_datetime(start_date)
+        stop_date = parse_datetime(stop_date)
+
+        def _compute():
+            groups = self.env["sale.order.line"].read_group(
+                self._get_overlap_domain(products, start_date, stop_date),
+                fields=["product_uom_qty", "qty_returned"],
+                groupby=["product_id"],
+            )
 
-        res = self.env["sale.rental.schedule"]
+            instrumentation.count_records(len(groups))
+            return {group["product_id"][0]: _reserved_qty(group) for group in groups}
 
-        reservations = self.env["sale.order.line"]
+        return self._get_cached(products, ("reserved_qty", start_date, stop_date), _compute)
 
+    def _get_total_units(self, product):
+        """
+        Total units of a product, being what's currently out on rent plus the
+        on hand quantity. When the setting rental_check_availability_on_all_products
+        is enabled this is the total of all variants of the product template.
+        """
         if product.product_tmpl_id.rental_check_availability_on_all_products:
-            for prod in product.product_tmpl_id.product_variant_ids:
-                reservations += self.get_reservations(prod)
-        else:
-            reservations = self.get_reservations(product)
+            return product.product_tmpl_id.qty_in_rent + product.product_tmpl_id.qty_available
 
-        if not reservations:
-            return res
+        return product.qty_in_rent + product.qty_available
 
-        rental_schedules = self.env['sale.rental.schedule'].search([('order_line_id', 'in', reservations.ids)])
+    def _get_scheduling_context(self, timezone=None):
+        """
+        Resolves the timezone of a request into a SchedulingContext, which
+        can then be passed on as timezone to prevent resolving it again.
 
-        for reservation in rental_schedules:
-            if self.range_overlaps(
-                    (start_date, stop_date),
-                    (
-                            reservation.pickup_date,
-                            reservation.return_date
-                    ),
-            ):
-                res |= reservation
+        The timezone of a logged in user comes first, then the given timezone
+        (the browser timezone for website requests), then the timezone of the
+        public user and finally UTC.
+        """
+        if isinstance(timezone, SchedulingContext):
+            return timezone
+
+        user = self.env.user
+        return SchedulingContext((not user._is_public() and user.tz) or timezone or user.tz)
+
+    def _lock_availability(self, products):
+        """
+        Locks the availability pools of products until the end of the
+        transaction, so that transactions checking and booking the same pool
+        at the same time are serialized while other products are unaffected.
+        """
+        pools = [self._get_pool_products(product) for product in products.filtered("rent_ok")]
+        self.env["website.rentals.availability.version"].sudo()._lock(self.env["product.product"].union(*pools))
+
+    def _get_cart_hold_minutes(self):
+        """
+        Minutes that rental products added to a cart are held for, set with
+        the system parameter website_rentals.cart_hold_minutes. Cart lines are
+        not held when it is not set.
+        """
+        try:
+            return int(self.env["ir.config_parameter"].sudo().get_param("website_rentals.cart_hold_minutes", 0))
+        except ValueError:
+            return 0
 
-        return res.order_line_id
+    def _get_pool_products(self, product):
+        """
+        Products sharing their availability with the given product. This is
+        every variant of the product template when the setting
+        rental_check_availability_on_all_products is enabled.
+        """
+        if product.product_tmpl_id.rental_check_availability_on_all_products:
+            return product.product_tmpl_id.product_variant_ids
+
+        return product
+
+    def get_overlapping_reservations(self, product, start_date, stop_date):
+        """Returns order lines that are confirmed for a given product and time period."""
+
+        index = self._get_reservation_index(product, start_date)
+        if index is not None:
+            return self.env["sale.order.line"].browse(
+                index.overlapping(parse_datetime(start_date), parse_datetime(stop_date))
+            )
+
+        reservations = self.env["sale.order.line"].search(
+            self._get_overlap_domain(self._get_pool_products(product), start_date, stop_date)
+        )
+        instrumentation.count_records(len(reservations))
+
+        return reservations.filtered(_reserved_qty)
 
     def get_reservations(self, product):
         """
@@ -117,15 +329,37 @@ class SchedulingHelper(models.AbstractModel):
         Returns a list of order lines where this product is currently reserved.
         """
 
-        return self.env["sale.order.line"].search(
-            [
-                ("order_id.is_rental_order", "=", True),
-                ("product_id", "=", product.id),
-                '|',
-                ("order_id.rental_status", "in", ("pickup", "return")),
-                ('order_id.state', '=', 'sale')
-            ]
-        )
+        return self.env["sale.order.line"].search(self._get_reservation_domain(product))
+
+    def _get_reservation_domain(self, products):
+        """
+        Domain for the order lines that reserve any of the given products,
+        being the active rentals and the cart lines that are on hold. Lines
+        only reserve the units that haven't been returned yet, see
+        _reserved_qty().
+
+        Holds count until they are released by the scheduled action, see
+        SaleOrderLine._release_expired_rental_holds(). Releasing a hold
+        outdates the cached availability of its product, while a hold that
+        merely passed its expiry date would stay in every worker's cache.
+        """
+        return [
+            ("product_id", "in", products.ids),
+            "|",
+            ("is_active_rental", "=", True),
+            ("rental_hold_until", "!=", False),
+        ]
+
+    def _get_overlap_domain(self, products, start_date, stop_date):
+        """
+        Domain for the order lines that reserve any of the given products at
+        some point in a time period. Like range_overlaps(), reservations that
+        only touch the edges of the period are included.
+        """
+        return self._get_reservation_domain(products) + [
+            ("pickup_date", "<=", parse_datetime(stop_date)),
+            ("return_date", ">=", parse_datetime(start_date)),
+        ]
 
     def range_overlaps(self, range_a, range_b):
         """
@@ -138,7 +372,7 @@ class SchedulingHelper(models.AbstractModel):
 
         return ((range_a[0] <= range_b[1]) and (range_a[1] >= range_b[0]))
 
-    def get_rental_hourly_timeslots(self, product, start_date, stop_date=None, quantity=0, include_start=True, include_stop=True, timezone=None):
+    def get_rental_hourly_timeslots(self, product, start_date, stop_date=None, quantity=0, include_start=True, include_stop=True, timezone=None, with_quantities=False):
         """
         Generates a set of timeslots for a certain time period based on this
         products rental pricing rules.
@@ -146,160 +380,571 @@ class SchedulingHelper(models.AbstractModel):
         The smallest interval, hourly pricing rule is used. For example, if a
         product has three rules for 1 hour, 2 hour, and 3 hours, then this is
         going to generate hourly time slots for the start slots.
+
+        A timeslot is available when the peak number of reserved units over
+        the period it would be booked for still leaves room for the requested
+        quantity. The reservations are loaded once into an occupancy timeline
+        which answers this for every candidate slot.
+
+        With with_quantities the response also holds the maximum quantity
+        that can be booked per timeslot, so that a client can filter the
+        timeslots for another quantity without asking again:
+
+            {
+                "start": ["08:00", "12:00"],
+                "stop": ["12:00", "13:00"],
+                "start_qty": {"08:00": 2.0, "12:00": 1.0},
+                "stop_qty": {"12:00": 2.0, "13:00": 1.0},
+            }
+
+        The timeslots for a quantity are those with at least that quantity,
+        unless no start or no stop timeslot is left, in which case none are.
         """
+        return self._get_hourly_timeslots(
+            product, start_date, stop_date, quantity, include_start, include_stop, timezone, with_quantities=with_quantities,
+        )
 
-        # Get total units for the product (or product template if the setting rental_check_availability_on_all_products is True)
-        if product.product_tmpl_id.rental_check_availability_on_all_products:
-            total_units = product.product_tmpl_id.qty_in_rent + product.product_tmpl_id.qty_available
-        else:
-            total_units = product.qty_in_rent + product.qty_available
+    def get_availability_calendar(self, product, start_date, stop_date, quantity=1, timezone=None):
+        """
+        Availability of a product for every day in a date range, keyed by date.
+
+            {
+                "2021-09-10": {"available_qty": 2.0, "start_timeslots": 3, "stop_timeslots": 7},
+                ...
+            }
+
+        available_qty is the number of units that are free for the whole day,
+        the timeslot counts are the number of same day start and stop
+        timeslots that can be booked for the given quantity. All days share a
+        single reservation fetch.
+        """
+        context = self._get_scheduling_context(timezone)
+        start_day = _start_of_day(parse_datetime(start_date))
+        stop_day = min(
+            _start_of_day(parse_datetime(stop_date)),
+            start_day + timedelta(days=MAX_CALENDAR_DAYS - 1),
+        )
+
+        total_units = self._get_total_units(product)
+        timeline = self._get_occupancy_timeline(product, start_day, stop_day + timedelta(days=1), context)
+
+        calendar = {}
+        day = start_day
+        while day <= stop_day:
+            timeslots = self._get_hourly_timeslots(
+                product, day, day, quantity, timezone=context, timeline=timeline, total_units=total_units,
+            ) or {}
+            calendar[day.strftime("%Y-%m-%d")] = {
+                "available_qty": max(0, total_units - timeline.peak(day, day + timedelta(days=1))),
+                "start_timeslots": len(timeslots.get("start", [])),
+                "stop_timeslots": len(timeslots.get("stop", [])),
+            }
+            day += timedelta(days=1)
+
+        return calendar
+
+    def get_quote(self, product, start_date, stop_date, quantity=1, start_slot=None, stop_slot=None, timezone=None, with_quantities=False):
+        """
+        Everything the rental wizard needs for a date range in one go, based on
+        a single reservation fetch and total units computation.
+
+            {
+                "available_qty": 2.0,
+                "start": ["08:00", "12:00"],
+                "stop": ["12:00", "13:00"],
+                "can_rent": False,
+            }
+
+        When a start slot is selected the stop timeslots are the ones that can
+        follow it. can_rent is only checked once both a start and stop slot
+        are selected.
+
+        With with_quantities the timeslots aren't limited to the quantity,
+        they come with the maximum quantity per timeslot instead, see
+        get_rental_hourly_timeslots().
+        """
+        context = self._get_scheduling_context(timezone)
+        start_date = parse_datetime(start_date)
+        stop_date = parse_datetime(stop_date)
+
+        total_units = self._get_total_units(product)
+        timeline = self._get_occupancy_timeline(
+            product,
+            _start_of_day(start_date),
+            _start_of_day(stop_date) + timedelta(days=1),
+            context,
+        )
+
+        timeslot_quantity = 0 if with_quantities else quantity
+        timeslots = self._get_hourly_timeslots(
+            product, start_date, stop_date, timeslot_quantity, timezone=context, timeline=timeline, total_units=total_units,
+            with_quantities=with_quantities,
+        ) or {}
+
+        if start_slot:
+            timeslots.update(self._get_hourly_timeslots(
+                product, start_slot, stop_date, timeslot_quantity, include_start=False, timezone=context, timeline=timeline,
+                total_units=total_units, with_quantities=with_quantities,
+            ) or {"stop": [], "stop_qty": {}})
+
+        quote = {
+            "available_qty": max(0, total_units - timeline.reserved(start_date, stop_date)) if stop_date >= start_date else 0,
+            "start": timeslots.get("start", []),
+            "stop": timeslots.get("stop", []),
+            "can_rent": False,
+        }
+
+        if with_quantities:
+            quote["start_qty"] = timeslots.get("start_qty", {})
+            quote["stop_qty"] = timeslots.get("stop_qty", {})
+
+        if start_slot and stop_slot and parse_datetime(stop_slot) >= parse_datetime(start_slot):
+            if product.type != "product":
+                quote["can_rent"] = True
+            elif product.rent_ok:
+                quote["can_rent"] = self._can_rent(
+                    product,
+                    context.to_utc(start_slot),
+                    max(0, total_units - timeline.reserved(parse_datetime(start_slot), parse_datetime(stop_slot))),
+                    quantity,
+                )
+
+        return quote
+
+    def find_next_available(self, product, duration, qty=1, after=None, limit=1, timezone=None):
+        """
+        Earliest periods of a duration in hours, from after (defaults to now)
+        onwards, in which a quantity of a product can be rented. Returns up
+        to limit (start, stop) pairs of naive local datetimes.
+
+        Periods start and stop on the timeslots of the shortest hourly pricing
+        rule, like the ones offered by get_rental_hourly_timeslots(). The
+        candidate periods of several days at a time are checked against a
+        single occupancy timeline, so looking for more periods costs no extra
+        queries.
+        """
+        grid = self._get_slot_grid(product)
+        if not grid or not product.rent_ok or duration <= 0:
+            return []
+
+        context = self._get_scheduling_context(timezone)
+        duration = timedelta(hours=duration)
+        cutoff = max(
+            parse_datetime(after) if after else context.now,
+            context.now + timedelta(hours=product.preparation_time or 0),
+        )
+        is_stockable = product.type == "product"
+        total_units = self._get_total_units(product) if is_stockable else 0
+
+        periods = []
+        day = _start_of_day(cutoff)
+        last_day = day + timedelta(days=MAX_SEARCH_DAYS)
+        while day < last_day and len(periods) < limit:
+            stop_day = min(day + timedelta(days=MAX_CALENDAR_DAYS), last_day)
+
+            windows = []
+            while day < stop_day:
+                windows.extend(window for window in self._get_candidate_periods(grid, day, duration) if window[0] >= cutoff)
+                day += timedelta(days=1)
+
+            if is_stockable and windows:
+                timeline = self._get_occupancy_timeline(product, windows[0][0], windows[-1][1], context)
+                windows = [window for window, peak in zip(windows, timeline.peaks(windows)) if peak + qty <= total_units]
+
+            periods.extend(windows[:limit - len(periods)])
+
+        return periods
+
+    def _get_candidate_periods(self, grid, day, duration):
+        """
+        Periods of a duration starting on a day that follow the timeslots of a
+        slot grid, see _start_timeslots() and _stop_timeslots(). Same day
+        periods start every rule duration and last at least as long, periods
+        over multiple days start on every timeslot.
+        """
+        periods = []
+        for time in grid.times:
+            start = _timeslot_datetime(day, time)
+            stop = start + duration
+
+            if stop.date() == start.date() and (
+                time not in grid.same_day_start_time_set or duration < timedelta(minutes=grid.duration)
+            ):
+                continue
+
+            stop_seconds = (stop - _start_of_day(stop)).total_seconds()
+            if stop_seconds % 60 == 0 and stop_seconds // 60 in grid.time_set:
+                periods.append((start, stop))
+
+        return periods
+
+    def _get_hourly_timeslots(self, product, start_date, stop_date=None, quantity=0, include_start=True, include_stop=True, timezone=None, timeline=None, total_units=None, with_quantities=False):
+        """
+        See get_rental_hourly_timeslots(). An occupancy timeline and the total
+        units can be passed in when the caller already has them, to prevent
+        loading the reservations again.
+        """
+        context = self._get_scheduling_context(timezone)
+
+        if total_units is None:
+            total_units = self._get_total_units(product)
 
         start_date = parse_datetime(start_date)
         stop_date = parse_datetime(stop_date or start_date)
         is_same_day = start_date.date() == stop_date.date()
 
-        if not product.rental_pricing_ids:
-            return
-
-        if "hour" not in product.mapped("rental_pricing_ids.unit"):
+        if not self._get_slot_grid(product):
             return
 
-        start_times = self._start_timeslots(product, start_date, same_day=is_same_day)
+        start_times = self._start_timeslots(product, start_date, same_day=is_same_day, now=context.now)
         if not start_times:
             return
 
-        stop_times = self._stop_timeslots(product, stop_date, same_day=is_same_day, offset=start_times[0])
+        stop_times = self._stop_timeslots(product, stop_date, same_day=is_same_day, offset=start_times[0], now=context.now)
         if not stop_times:
             return
 
-        timezone = self.env.user.tz or timezone
+        start_day = _start_of_day(start_date)
+        stop_day = _start_of_day(stop_date)
+
+        if timeline is None:
+            timeline = self._get_occupancy_timeline(product, start_day, stop_day + timedelta(days=1), context)
+
+        # Units that are free on all days in between, every timeslot of a longer booking is limited to these
+        max_qty = None
+
+        def _available_qtys(windows):
+            return [total_units - peak for peak in timeline.peaks(windows)]
 
-        # Find all possible overlapping reservations
-        overlapping_reservations = self.env['sale.rental.schedule'].search([
-            ('report_line_status', 'in', ['reserved', 'pickedup']),
-            ('product_id', 'in', product.product_tmpl_id.product_variant_ids.ids if product.product_tmpl_id.rental_check_availability_on_all_products else [product.id]),
-            '|',
-            '&', ('pickup_date', '>=', start_date), ('pickup_date', '<=', stop_date + timedelta(days=1)),
-            '&', ('return_date', '>=', start_date), ('return_date', '<=', stop_date + timedelta(days=1)),
-        ])
+        def _bookable(times, windows):
+            """(time, available quantity) of the timeslots that leave room for the quantity."""
+            qtys = _available_qtys(windows)
+            if max_qty is not None:
+                qtys = [min(qty, max_qty) for qty in qtys]
+            return [(time, qty) for time, qty in zip(times, qtys) if qty >= quantity]
+
+        # Every booked timeslot covers at least one slot step
+        step = timedelta(minutes=SLOT_STEP)
+
+        if is_same_day:
+            start_windows = [
+                (_timeslot_datetime(start_date, time), _timeslot_datetime(start_date, time) + step)
+                for time in start_times
+            ]
+
+            # Stop times can never come before the (selected) start time
+            start_time = start_date.hour * 60 + start_date.minute
+            stop_times = [time for time in stop_times if time > start_time]
 
-        # Check for overlaps when the duration is over more than one day. If there are too many overlaps, return no available slots
-        if not is_same_day:
             if include_start:
-                overlaps = overlapping_reservations.filtered(
-                    lambda r: start_date + timedelta(days=1) <= r.pickup_date < stop_date or start_date + timedelta(days=1) <= r.return_date < stop_date)
+                stop_windows = [
+                    (_timeslot_datetime(stop_date, time) - step, _timeslot_datetime(stop_date, time))
+                    for time in stop_times
+                ]
             else:
-                overlaps = overlapping_reservations.filtered(lambda r: start_date <= r.pickup_date < stop_date or start_date <= r.return_date < stop_date)
-
-            if len(overlaps) + quantity > total_units:
-                return {
-                    'start': [],
-                    'stop': []
-                }
-
-        # Search for stop times to remove because they are not available because of overlapping bookings
-        remove_stop_times = []
-        remove_all_following = False
-        for stop_time in stop_times:
-            if not is_same_day:
-                stop_datetime = stop_date.replace(hour=int(stop_time))
-                if include_start:
-                    overlaps = overlapping_reservations.filtered(lambda r: stop_date <= r.pickup_date.astimezone(pytz.timezone(timezone)).replace(
-                        tzinfo=None) <= stop_datetime or stop_date <= r.return_date.astimezone(pytz.timezone(timezone)).replace(
-                        tzinfo=None) < stop_datetime)
-                else:
-                    overlaps = overlapping_reservations.filtered(lambda r: start_date <= r.pickup_date.astimezone(pytz.timezone(timezone)).replace(
-                        tzinfo=None) <= stop_datetime or start_date <= r.return_date.astimezone(pytz.timezone(timezone)).replace(
-                        tzinfo=None) < stop_datetime)
-                if len(overlaps) + quantity > total_units:
-                    remove_stop_times.append(stop_time)
-            else:
-                if stop_time <= start_date.hour or remove_all_following:
-                    remove_stop_times.append(stop_time)
-                else:
-                    overlaps = overlapping_reservations.filtered(
-                        lambda r: r.pickup_date.astimezone(pytz.timezone(timezone)).replace(tzinfo=None).hour <= stop_time <= r.return_date.astimezone(
-                            pytz.timezone(timezone)).replace(tzinfo=None).hour)
-                    if len(overlaps) + quantity > total_units:
-                        remove_stop_times.append(stop_time)
-                        if include_stop and not include_start:
-                            remove_all_following = True
-
-        for remove in remove_stop_times:
-            stop_times.remove(remove)
-
-        # Search for start times to remove because they are not available because of overlapping bookings
-        remove_start_times = []
-        for start_time in start_times:
-            if not is_same_day:
-                start_datetime = start_date.replace(hour=int(start_time))
-                overlaps = overlapping_reservations.filtered(
-                    lambda r:
-                    stop_date >= r.pickup_date.astimezone(pytz.timezone(timezone)).replace(tzinfo=None) >= start_datetime
-                    or stop_date >= r.return_date.astimezone(pytz.timezone(timezone)).replace(tzinfo=None) >= start_datetime
-                )
-                if len(overlaps) + quantity > total_units:
-                    remove_start_times.append(start_time)
+                # The start time is selected, the whole booking has to fit
+                stop_windows = [(start_date, _timeslot_datetime(stop_date, time)) for time in stop_times]
+        else:
+            # Check for overlaps on the days in between. If there are too many overlaps, return no available slots
+            if include_start:
+                max_qty = _available_qtys([(start_day + timedelta(days=1), stop_day)])[0]
+                if max_qty < quantity:
+                    return self._timeslots_values([], [], include_start, include_stop, with_quantities)
+
+            start_windows = [(_timeslot_datetime(start_date, time), stop_day) for time in start_times]
+
+            if include_start:
+                stop_windows = [(stop_day, _timeslot_datetime(stop_date, time)) for time in stop_times]
             else:
-                if len(overlapping_reservations.filtered(
-                        lambda r:
-                        r.pickup_date.astimezone(pytz.timezone(timezone)).replace(tzinfo=None).hour <= start_time <= r.return_date.astimezone(
-                            pytz.timezone(timezone)).replace(tzinfo=None).hour)) + quantity > total_units:
-                    remove_start_times.append(start_time)
+                stop_windows = [(start_date, _timeslot_datetime(stop_date, time)) for time in stop_times]
 
-        for remove in remove_start_times:
-            start_times.remove(remove)
+        start_slots = _bookable(start_times, start_windows) if include_start else []
+        stop_slots = _bookable(stop_times, stop_windows)
 
         # If start times or stop times are empty, we clear both because we cannot book a timeslot without a start or stop time
         if include_start and include_stop:
-            if not start_times or not stop_times:
-                start_times = []
-                stop_times = []
+            if not start_slots or not stop_slots:
+                start_slots = []
+                stop_slots = []
+
+        return self._timeslots_values(start_slots, stop_slots, include_start, include_stop, with_quantities)
 
+    def _timeslots_values(self, start_slots, stop_slots, include_start=True, include_stop=True, with_quantities=False):
+        """
+        Timeslots response for lists of (time, available quantity) pairs, see
+        get_rental_hourly_timeslots().
+        """
         return_values = {}
 
         if include_start:
             return_values.update({
-                "start": list(map(_format_timeslot_time, start_times)),
+                "start": [_format_timeslot_time(time) for time, qty in start_slots],
             })
+            if with_quantities:
+                return_values["start_qty"] = {_format_timeslot_time(time): max(0, qty) for time, qty in start_slots}
 
         if include_stop:
             return_values.update({
-                "stop": list(map(_format_timeslot_time, stop_times)),
+                "stop": [_format_timeslot_time(time) for time, qty in stop_slots],
             })
+            if with_quantities:
+                return_values["stop_qty"] = {_format_timeslot_time(time): max(0, qty) for time, qty in stop_slots}
 
         return return_values
 
-    def _start_timeslots(self, product, date, same_day=False):
-        """Rentable start timeslots for a product."""
-        price_rule = product.shortest_price_rule()
-        step = 1.0 if not same_day else price_rule.duration
-        times = float_range(price_rule.start_time, price_rule.end_time, step)
-
-        if product.preparation_time:
-            times = filter(
-                _filter_preparation_time(
-                    date,
-                    cutoff=datetime.now() + timedelta(hours=product.preparation_time),
-                ),
-                times,
+    def _get_occupancy_timeline(self, product, start_date, stop_date, context=None):
+        """
+        Loads the reservations of a product (or its availability pool) between
+        two naive local datetimes into an occupancy timeline. Reservation dates
+        are converted to the local timezone of the scheduling context once,
+        without a context the timeline is in UTC.
+
+        When the occupancy table is enabled the timeline is built from the
+        precomputed hourly occupancy instead of the reservations, unless the
+        occupancy of the products still has to be refreshed.
+        """
+        products = self._get_pool_products(product)
+        context = context or SchedulingContext()
+        use_occupancy_table = (
+            self._use_occupancy_table()
+            and not self.env["website.rentals.availability.job"].sudo()._has_pending(products)
+        )
+        engine = self._get_timeline_engine()
+        timeline_class, hourly_timeline_class = TIMELINE_ENGINES[engine]
+
+        def _compute():
+            if use_occupancy_table:
+                hours = self.env["website.rentals.occupancy"].sudo()._get_hourly_occupancy(
+                    products, start_date - timedelta(days=1), stop_date + timedelta(days=1),
+                )
+                instrumentation.count_records(len(hours))
+                return hourly_timeline_class(
+                    ((context.to_local(hour), qty) for hour, qty in hours),
+                    step=timedelta(hours=1),
+                )
+
+            # Reservations are stored in UTC, widen the period by a day to cover any timezone offset
+            index = self._get_reservation_index(product, start_date - timedelta(days=1))
+            if index is not None:
+                reservations = [
+                    index.reservations[id_]
+                    for id_ in index.overlapping(start_date - timedelta(days=1), stop_date + timedelta(days=1))
+                ]
+            else:
+                reservations = [
+                    (reservation["pickup_date"], reservation["return_date"], _reserved_qty(reservation))
+                    for reservation in self.env["sale.order.line"].search_read(
+                        self._get_reservation_domain(products) + [
+                            ("pickup_date", "<", stop_date + timedelta(days=1)),
+                            ("return_date", ">", start_date - timedelta(days=1)),
+                        ],
+                        fields=["pickup_date", "return_date", "product_uom_qty", "qty_returned"],
+                    )
+                ]
+                instrumentation.count_records(len(reservations))
+
+            return timeline_class(
+                (context.to_local(pickup_date), context.to_local(return_date), qty)
+                for pickup_date, return_date, qty in reservations
+            )
+
+        return self._get_cached(products, ("timeline", start_date, stop_date, context.timezone, use_occupancy_table, engine), _compute)
+
+    def _get_reservation_index(self, product, start_date):
+        """
+        Index of the reservations of a product (or its availability pool) in
+        UTC, for answering queries about a period starting at start_date.
+
+        Only reservations that are returned after the start of the day before
+        yesterday are indexed, leaving room for the widened local periods of
+        the timeslots, so None is returned for periods starting before it.
+        The index is built once per worker and kept until a booking of the
+        pool changes.
+        """
+        horizon = _start_of_day(datetime.now()) - timedelta(days=2)
+        if parse_datetime(start_date) < horizon:
+            return None
+
+        products = self._get_pool_products(product)
+
+        def _compute():
+            reservations = self.env["sale.order.line"].search_read(
+                self._get_reservation_domain(products) + [("return_date", ">=", horizon)],
+                fields=["pickup_date", "return_date", "product_uom_qty", "qty_returned"],
+            )
+            instrumentation.count_records(len(reservations))
+
+            # Lines that have been returned in full no longer reserve anything
+            return ReservationIndex(
+                (reservation["pickup_date"], reservation["return_date"], _reserved_qty(reservation), reservation["id"])
+                for reservation in reservations
+                if _reserved_qty(reservation)
+            )
+
+        return self._get_cached(products, ("reservation_index", horizon), _compute)
+
+    def get_product_profile(self, product):
+        """
+        Rental data of a product that rarely changes, as used by the rental
+        wizard and the timeslot generation. Profiles are cached per worker
+        and language until the product or its pricing rules change.
+
+            {
+                "id": 12,
+                "display_name": "Meeting Room",
+                "preparation_time": 0.0,
+                "pricing_rules": [{"id": 3, "duration": 4, "unit": "hour", ...}],
+                "hourly_rule": {"id": 3, "duration": 4, "unit": "hour", ...},
+                ...
+            }
+
+        hourly_rule is the shortest hourly pricing rule, which the timeslots
+        are based on.
+        """
+
+        def _compute():
+            rules = [
+                PriceRule(rule.id, rule.duration, rule.unit, rule.price, rule.start_time, rule.end_time)
+                for rule in product.rental_pricing_ids
+            ]
+            hourly_rules = sorted(
+                (rule for rule in rules if rule.unit == "hour"),
+                key=lambda rule: (rule.duration, rule.id),
             )
 
-        times = filter(_filter_after_now(date), times)
+            return {
+                "id": product.id,
+                "name": product.name,
+                "display_name": product.display_name,
+                "description_sale": product.description_sale or False,
+                "preparation_time": product.preparation_time,
+                "pricing_rules": [rule._asdict() for rule in rules],
+                "hourly_rule": hourly_rules[0]._asdict() if hourly_rules else False,
+            }
 
-        return list(times)
+        return self._get_cached(product, ("profile", self.env.lang), _compute)
 
-    def _stop_timeslots(self, product, date, same_day=False, offset=None):
-        """Rentalable end timeslots for a product."""
-        price_rule = product.shortest_price_rule()
-        step = 1.0
+    def _get_hourly_price_rule(self, product):
+        """Shortest hourly pricing rule of a product as a PriceRule, if any."""
+        rule = self.get_product_profile(product)["hourly_rule"]
+        return PriceRule(**rule) if rule else None
 
-        times = float_range(
-            offset + price_rule.duration if same_day else price_rule.start_time,
-            price_rule.end_time,
-            step,
+    def _get_slot_grid(self, product):
+        """
+        Slot grid of the shortest hourly pricing rule of a product, if any.
+        Grids are compiled once per worker for the times of a rule.
+        """
+        rule = self._get_hourly_price_rule(product)
+        if not rule:
+            return None
+
+        return slots.get_grid(rule.start_time, rule.end_time, rule.duration, SLOT_STEP)
+
+    def _invalidate_product_profiles(self, products):
+        """Called whenever the rental data of products changes, outdating their profiles."""
+        self.env["website.rentals.availability.version"].sudo()._bump(products)
+
+    def _get_cached(self, products, key, compute):
+        """
+        Availability data of a set of products from the process wide cache,
+        computed on a miss. Entries are outdated as soon as a booking of one
+        of the products changes, see _invalidate_availability().
+        """
+        version = self.env["website.rentals.availability.version"].sudo()._get_version(products)
+
+        # Without superuser rights the record rules of the user apply to the data
+        key = (self.env.cr.dbname, "su" if self.env.su else self.env.uid, tuple(products.ids)) + key
+
+        return availability_cache.get_or_compute(key, version, compute)
+
+    def _invalidate_availability(self, reservations):
+        """
+        Called whenever bookings change, with the (product, pickup date, return
+        date) of every booking before and after the change.
+        """
+        periods = {}
+        for product, pickup_date, return_date in reservations:
+            if not product.rent_ok:
+                continue
+
+            start_date, stop_date = periods.get(product, (pickup_date, return_date))
+            if pickup_date and return_date and start_date and stop_date:
+                periods[product] = (min(start_date, pickup_date), max(stop_date, return_date))
+            else:
+                # Without dates the whole booking history of the product is affected
+                periods[product] = (None, None)
+
+        if not periods:
+            return
+
+        self.env["website.rentals.availability.version"].sudo()._bump(
+            self.env["product.product"].union(*periods)
         )
 
-        times = filter(_filter_after_now(date), times)
+        # Refreshing the occupancy is left to a scheduled action, until then it is not used for these products
+        if self._is_occupancy_table_enabled():
+            self.env["website.rentals.availability.job"].sudo()._enqueue(periods)
+        else:
+            self.env["website.rentals.occupancy"].sudo()._mark_outdated()
+
+    def _get_timeline_engine(self):
+        """
+        Engine computing the occupancy timelines, set with the system parameter
+        website_rentals.timeline_engine. Either "python" (the default) or
+        "numpy", which falls back to python when numpy is not installed.
+        """
+        engine = self.env["ir.config_parameter"].sudo().get_param("website_rentals.timeline_engine", "python")
+
+        if engine == "numpy" and occupancy_numpy.numpy is None:
+            _logger.warning("The numpy timeline engine is selected but numpy is not installed, falling back to python.")
+            return "python"
+
+        return engine if engine in TIMELINE_ENGINES else "python"
+
+    def _use_occupancy_table(self):
+        """
+        Whether availability is read from the precomputed occupancy table, once
+        it is enabled and has been rebuilt since bookings last changed while it
+        was disabled.
+        """
+        return self._is_occupancy_table_enabled() and self.env["website.rentals.occupancy"].sudo()._is_up_to_date()
+
+    def _is_occupancy_table_enabled(self):
+        """
+        Whether the occupancy table is kept up to date, enabled with the system
+        parameter website_rentals.use_occupancy_table.
+        """
+        return str2bool(
+            self.env["ir.config_parameter"].sudo().get_param("website_rentals.use_occupancy_table", "False"),
+            default=False,
+        )
+
+    def get_route_statistics(self):
+        """Latency, query and record percentiles of the website rental routes in this worker."""
+        return instrumentation.get_statistics()
+
+    def get_availability_cache_stats(self):
+        """Hit and miss counters of the availability cache of this worker."""
+        return availability_cache.stats()
+
+    def _start_timeslots(self, product, date, same_day=False, now=None):
+        """
+        Rentable start timeslots for a product in minutes after midnight, now
+        being the current local time.
+        """
+        now = now or datetime.now()
+        profile = self.get_product_profile(product)
+        grid = self._get_slot_grid(product)
+        cutoff = max(now, now + timedelta(hours=profile["preparation_time"] or 0))
+
+        return list(grid.after(grid.start_times(same_day), _cutoff_minutes(date, cutoff)))
+
+    def _stop_timeslots(self, product, date, same_day=False, offset=None, now=None):
+        """
+        Rentalable end timeslots for a product in minutes after midnight, now
+        being the current local time.
+        """
+        now = now or datetime.now()
+        grid = self._get_slot_grid(product)
 
-        return list(times)
+        return list(grid.after(grid.stop_times(offset if same_day else None), _cutoff_minutes(date, now)))
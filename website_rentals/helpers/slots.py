@@ -0,0 +1,79 @@
+import bisect
+import functools
+
+
+def to_minutes(time):
+    """
+    Converts a floating point time into whole minutes after midnight.
+
+        to_minutes(6.5)     => 390
+        to_minutes(7.75)    => 465
+    """
+    return int(round(time * 60))
+
+
+class SlotGrid:
+    """
+    Timeslots of an hourly pricing rule, as whole minutes after midnight.
+
+    Pricing rules store their times as floating point hours, adding these up
+    slot after slot drifts away from the actual times. A grid works with
+    integer minutes instead and is compiled once per rule, see get_grid().
+    The timeslots of a day are then a slice of the grid from a cutoff time.
+
+        grid = SlotGrid(8.0, 12.0, 2.0)
+        grid.start_times(same_day=True)              => (480, 600, 720)
+        grid.stop_times(offset=600)                  => (720,)
+        grid.after(grid.start_times(), 545)          => (600, 660, 720)
+
+    Timeslots are an hour apart by default, a step of 15 or 30 minutes gives
+    sub-hour timeslots. Same day bookings start every rule duration.
+    """
+
+    def __init__(self, start_time, end_time, duration, step=60):
+        self.start = to_minutes(start_time)
+        self.end = to_minutes(end_time)
+        self.duration = to_minutes(duration)
+        self.step = step
+
+        self.times = tuple(range(self.start, self.end + 1, step))
+        self.same_day_start_times = tuple(range(self.start, self.end + 1, self.duration or step))
+
+        # For checking if a time is on the grid
+        self.time_set = frozenset(self.times)
+        self.same_day_start_time_set = frozenset(self.same_day_start_times)
+
+    def __repr__(self):
+        return f"SlotGrid({self.start}, {self.end}, {self.duration}, step={self.step})"
+
+    def start_times(self, same_day=False):
+        """Start timeslots of bookings that stop on the same day or on a later day."""
+        return self.same_day_start_times if same_day else self.times
+
+    def stop_times(self, offset=None):
+        """
+        Stop timeslots, of a same day booking starting at offset when given.
+        Those stop at least a rule duration after the start.
+        """
+        if offset is None:
+            return self.times
+
+        first = offset + self.duration
+        if (first - self.start) % self.step == 0:
+            return self.after(self.times, first)
+
+        return tuple(range(first, self.end + 1, self.step))
+
+    @staticmethod
+    def after(times, cutoff):
+        """Timeslots at or after a cutoff in minutes, times being sorted."""
+        return times[bisect.bisect_left(times, cutoff):]
+
+
+@functools.lru_cache(maxsize=512)
+def get_grid(start_time, end_time, duration, step=60):
+    """
+    Compiled grid of the times of a pricing rule. Grids are cached by these
+    times, so a rule gets a new grid as soon as one of them changes.
+    """
+    return SlotGrid(start_time, end_time, duration, step)
@@ -24,3 +24,15 @@ def parse_datetime(data):
         return data.replace(tzinfo=None)
 
     raise Exception("parse_datetime only accepts a datetime or date as a parameter.")
+
+
+def floor_hour(data):
+    """Start of the hour of a datetime."""
+    return parse_datetime(data).replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(data):
+    """Start of the next hour of a datetime, unless it already is the start of an hour."""
+    data = parse_datetime(data)
+    hour = floor_hour(data)
+    return hour if hour == data else hour + datetime.timedelta(hours=1)
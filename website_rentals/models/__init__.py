@@ -1,4 +1,7 @@
+from . import availability_job
+from . import availability_version
 from . import currency
+from . import occupancy
 from . import product
 from . import product_template
 from . import rental_pricing
@@ -0,0 +1,117 @@
+from odoo import api, fields, models
+
+# Number of jobs processed per transaction by the scheduled action
+JOB_BATCH_SIZE = 100
+
+
+class AvailabilityJob(models.Model):
+    """
+    Pending recomputation of the occupancy of a product, for the hours between
+    start_date and stop_date or for all hours when these are empty.
+
+    Bookings only queue a job, so that large operations such as confirming
+    many rental orders at once don't refresh the occupancy table on the spot.
+    Jobs are deduplicated per product, a new job for a product with a pending
+    one widens the period of the pending job instead. A scheduled action
+    processes them in batches.
+    """
+
+    _name = "website.rentals.availability.job"
+    _description = "Rental Availability Job"
+    _order = "id"
+    _log_access = False
+
+    product_id = fields.Many2one(
+        "product.product",
+        string="Product",
+        required=True,
+        ondelete="cascade",
+    )
+
+    start_date = fields.Datetime(
+        string="Start Date",
+    )
+
+    stop_date = fields.Datetime(
+        string="Stop Date",
+    )
+
+    _sql_constraints = [
+        ("product_unique", "unique(product_id)", "A product can only have one pending availability job."),
+    ]
+
+    def _enqueue(self, periods):
+        """
+        Queues the recomputation of products for periods given as a
+        {product: (start date, stop date)} dict, where empty dates stand for
+        the whole booking history.
+        """
+        if not periods:
+            return
+
+        # An empty date on either side means the job covers the whole history
+        for product, (start_date, stop_date) in sorted(periods.items(), key=lambda period: period[0].id):
+            self.env.cr.execute(
+                """
+                INSERT INTO website_rentals_availability_job AS job (product_id, start_date, stop_date)
+                     VALUES (%s, %s, %s)
+                ON CONFLICT (product_id) DO UPDATE
+                        SET start_date = CASE
+                                WHEN job.start_date IS NULL OR EXCLUDED.start_date IS NULL THEN NULL
+                                ELSE LEAST(job.start_date, EXCLUDED.start_date)
+                            END,
+                            stop_date = CASE
+                                WHEN job.stop_date IS NULL OR EXCLUDED.stop_date IS NULL THEN NULL
+                                ELSE GREATEST(job.stop_date, EXCLUDED.stop_date)
+                            END
+                """,
+                [product.id, start_date or None, stop_date or None],
+            )
+
+        self.env.ref("website_rentals.ir_cron_process_availability_jobs")._trigger()
+
+    def _has_pending(self, products):
+        """Checks if any of the products has a job that hasn't been processed yet."""
+        if not products:
+            return False
+
+        self.env.cr.execute(
+            "SELECT 1 FROM website_rentals_availability_job WHERE product_id IN %s LIMIT 1",
+            [tuple(products.ids)],
+        )
+        return bool(self.env.cr.fetchone())
+
+    @api.model
+    def _process(self, batch_size=JOB_BATCH_SIZE, auto_commit=True):
+        """
+        Called by a scheduled action, refreshes the occupancy of the products
+        with pending jobs. Every batch is committed separately when auto_commit
+        is set. Jobs locked by another worker are skipped.
+        """
+        occupancy = self.env["website.rentals.occupancy"].sudo()
+
+        while True:
+            self.env.cr.execute(
+                """
+                   SELECT id, product_id, start_date, stop_date
+                     FROM website_rentals_availability_job
+                 ORDER BY id
+                    LIMIT %s
+               FOR UPDATE SKIP LOCKED
+                """,
+                [batch_size],
+            )
+            jobs = self.env.cr.fetchall()
+            if not jobs:
+                return
+
+            for job_id, product_id, start_date, stop_date in jobs:
+                occupancy._refresh(self.env["product.product"].browse(product_id), start_date, stop_date)
+
+            self.env.cr.execute(
+                "DELETE FROM website_rentals_availability_job WHERE id IN %s",
+                [tuple(job_id for job_id, product_id, start_date, stop_date in jobs)],
+            )
+
+            if auto_commit:
+                self.env.cr.commit()
@@ -0,0 +1,93 @@
+from odoo import fields, models
+
+
+class AvailabilityVersion(models.Model):
+    """
+    Version of the bookings of a product, changed whenever a booking of the
+    product changes. Cached availability data is stored along with these
+    versions so that every worker notices when it is outdated.
+    """
+
+    _name = "website.rentals.availability.version"
+    _description = "Rental Availability Version"
+    _log_access = False
+
+    product_id = fields.Many2one(
+        "product.product",
+        string="Product",
+        required=True,
+        ondelete="cascade",
+    )
+
+    version = fields.Integer(
+        string="Version",
+        required=True,
+    )
+
+    _sql_constraints = [
+        ("product_unique", "unique(product_id)", "A product can only have one availability version."),
+    ]
+
+    def init(self):
+        # Versions come from a sequence so that the version of a rolled back
+        # transaction is never handed out again.
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS website_rentals_availability_version_seq")
+
+    def _get_version(self, products):
+        """Current version of the bookings of a set of products."""
+        if not products:
+            return 0
+
+        self.env.cr.execute(
+            "SELECT COALESCE(MAX(version), 0) FROM website_rentals_availability_version WHERE product_id IN %s",
+            [tuple(products.ids)],
+        )
+        return self.env.cr.fetchone()[0]
+
+    def _bump(self, products):
+        """Gives the products a new version, outdating their cached availability."""
+        if not products:
+            return
+
+        self.env.cr.execute(
+            """
+            INSERT INTO website_rentals_availability_version (product_id, version)
+                 SELECT product_id, nextval('website_rentals_availability_version_seq')
+                   FROM unnest(%s) AS product_id
+            ON CONFLICT (product_id) DO UPDATE SET version = EXCLUDED.version
+            """,
+            [products.ids],
+        )
+
+    def _lock(self, products):
+        """
+        Locks the versions of products until the end of the transaction. As
+        every booking bumps these versions, only the transaction holding the
+        lock can book the products. When another transaction booked them
+        after this one started, PostgreSQL raises a serialization error and
+        the request is retried, after which the new booking is seen.
+        """
+        if not products:
+            return
+
+        # Rows are locked in the same order by every transaction to prevent deadlocks
+        product_ids = sorted(products.ids)
+        self.env.cr.execute(
+            """
+            INSERT INTO website_rentals_availability_version (product_id, version)
+                 SELECT product_id, 0
+                   FROM unnest(%s) AS product_id
+            ON CONFLICT (product_id) DO NOTHING
+            """,
+            [product_ids],
+        )
+        self.env.cr.execute(
+            """
+               SELECT id
+                 FROM website_rentals_availability_version
+                WHERE product_id IN %s
+             ORDER BY product_id
+           FOR UPDATE
+            """,
+            [tuple(product_ids)],
+        )
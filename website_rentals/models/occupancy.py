@@ -0,0 +1,141 @@
+from odoo import fields, models
+from odoo.addons.website_rentals.helpers.time import ceil_hour, floor_hour
+
+
+class RentalOccupancy(models.Model):
+    """
+    Precomputed number of units of a product that are reserved per hour.
+
+    Every hour a reservation overlaps counts the full reserved quantity, so
+    the occupancy of an hour is the most units that can be out during it.
+    Rows are refreshed for the affected hours whenever bookings change, use
+    rebuild() to backfill the whole table.
+
+    Bookings changed while the table is disabled are not refreshed, these
+    outdate the table until it is rebuilt again. The time of the last full
+    rebuild is kept in the system parameter website_rentals.occupancy_rebuilt_at.
+    """
+
+    _name = "website.rentals.occupancy"
+    _description = "Rental Occupancy"
+    _order = "product_id, hour"
+    _log_access = False
+
+    product_id = fields.Many2one(
+        "product.product",
+        string="Product",
+        required=True,
+        ondelete="cascade",
+    )
+
+    product_tmpl_id = fields.Many2one(
+        "product.template",
+        string="Product Template",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+
+    hour = fields.Datetime(
+        string="Hour",
+        required=True,
+    )
+
+    reserved_qty = fields.Float(
+        string="Reserved Quantity",
+    )
+
+    _sql_constraints = [
+        ("product_hour_unique", "unique(product_id, hour)", "A product can only have one occupancy per hour."),
+    ]
+
+    def rebuild(self, products=None):
+        """
+        Rebuilds the occupancy of the given products, or of all rental
+        products. Only a rebuild of all products brings an outdated table
+        back into use.
+        """
+        if products is not None:
+            self._refresh(products)
+            return
+
+        self._refresh(self.env["product.product"].with_context(active_test=False).search([("rent_ok", "=", True)]))
+        self.env["ir.config_parameter"].sudo().set_param(
+            "website_rentals.occupancy_rebuilt_at", fields.Datetime.to_string(fields.Datetime.now()),
+        )
+
+    def _is_up_to_date(self):
+        """Whether the table has been rebuilt since bookings last changed without refreshing it."""
+        return bool(self.env["ir.config_parameter"].sudo().get_param("website_rentals.occupancy_rebuilt_at"))
+
+    def _mark_outdated(self):
+        """Called when bookings change without refreshing the table, which then needs a rebuild."""
+        if self._is_up_to_date():
+            self.env["ir.config_parameter"].sudo().set_param("website_rentals.occupancy_rebuilt_at", False)
+
+    def _refresh(self, products, start_date=None, stop_date=None):
+        """
+        Recomputes the occupancy of products from their reservations, limited
+        to the hours overlapping a period when one is given.
+        """
+        if not products:
+            return
+
+        self.flush()
+
+        # Whole hours are refreshed, so that every reservation in them is taken into account
+        params = {
+            "product_ids": tuple(products.ids),
+            "start": start_date and floor_hour(start_date),
+            "stop": stop_date and ceil_hour(stop_date),
+        }
+
+        self.env.cr.execute(
+            """
+            DELETE FROM website_rentals_occupancy
+                  WHERE product_id IN %(product_ids)s
+                    AND (%(start)s IS NULL OR hour >= %(start)s)
+                    AND (%(stop)s IS NULL OR hour < %(stop)s)
+            """,
+            params,
+        )
+
+        # GREATEST and LEAST ignore the NULL boundaries of a full rebuild
+        self.env.cr.execute(
+            """
+            INSERT INTO website_rentals_occupancy (product_id, product_tmpl_id, hour, reserved_qty)
+                 SELECT sol.product_id, pp.product_tmpl_id, bucket.hour, SUM(sol.product_uom_qty - COALESCE(sol.qty_returned, 0))
+                   FROM sale_order_line sol
+                   JOIN product_product pp ON pp.id = sol.product_id
+             CROSS JOIN LATERAL generate_series(
+                            date_trunc('hour', GREATEST(sol.pickup_date, %(start)s)),
+                            LEAST(sol.return_date, %(stop)s) - interval '1 second',
+                            interval '1 hour'
+                        ) AS bucket(hour)
+                  WHERE sol.product_id IN %(product_ids)s
+                    AND (sol.is_active_rental OR sol.rental_hold_until IS NOT NULL)
+                    AND sol.pickup_date < sol.return_date
+                    AND sol.product_uom_qty > COALESCE(sol.qty_returned, 0)
+                    AND (%(stop)s IS NULL OR sol.pickup_date < %(stop)s)
+                    AND (%(start)s IS NULL OR sol.return_date > %(start)s)
+               GROUP BY sol.product_id, pp.product_tmpl_id, bucket.hour
+            """,
+            params,
+        )
+
+        self.invalidate_cache()
+
+    def _get_hourly_occupancy(self, products, start_date, stop_date):
+        """(hour, reserved quantity) of a set of products for the hours in a period."""
+        self.env.cr.execute(
+            """
+              SELECT hour, SUM(reserved_qty)
+                FROM website_rentals_occupancy
+               WHERE product_id IN %s
+                 AND hour >= %s
+                 AND hour < %s
+            GROUP BY hour
+            """,
+            [tuple(products.ids), floor_hour(start_date), stop_date],
+        )
+        return self.env.cr.fetchall()
@@ -4,9 +4,24 @@ from odoo import _, models
 from odoo.addons.website_rentals.helpers.time import parse_datetime
 
 
+# Variant fields that are part of the rental profile, see SchedulingHelper.get_product_profile()
+PROFILE_FIELDS = {
+    "default_code",
+    "product_template_attribute_value_ids",
+}
+
+
 class Product(models.Model):
     _inherit = "product.product"
 
+    def write(self, vals):
+        res = super().write(vals)
+
+        if PROFILE_FIELDS.intersection(vals):
+            self.env["website.rentals.scheduling"]._invalidate_product_profiles(self)
+
+        return res
+
     def can_rent(self, start_date, stop_date, qty=None):
         return self.env["website.rentals.scheduling"].can_rent(
             self, start_date, stop_date, qty=qty
@@ -17,9 +32,29 @@ class Product(models.Model):
             self, start_date, stop_date
         )
 
-    def get_rental_hourly_timeslots(self, start_date, stop_date=None, quantity=0, include_start=True, include_stop=True, timezone=None):
+    def get_available_rental_qtys(self, start_date, stop_date):
+        return self.env["website.rentals.scheduling"].get_available_qtys(
+            self, start_date, stop_date
+        )
+
+    def get_rental_hourly_timeslots(self, start_date, stop_date=None, quantity=0, include_start=True, include_stop=True, timezone=None, with_quantities=False):
         return self.env["website.rentals.scheduling"].get_rental_hourly_timeslots(
-            self, start_date, stop_date, quantity, include_start, include_stop, timezone
+            self, start_date, stop_date, quantity, include_start, include_stop, timezone, with_quantities
+        )
+
+    def get_rental_availability_calendar(self, start_date, stop_date, quantity=1, timezone=None):
+        return self.env["website.rentals.scheduling"].get_availability_calendar(
+            self, start_date, stop_date, quantity, timezone
+        )
+
+    def get_rental_quote(self, start_date, stop_date, quantity=1, start_slot=None, stop_slot=None, timezone=None, with_quantities=False):
+        return self.env["website.rentals.scheduling"].get_quote(
+            self, start_date, stop_date, quantity, start_slot, stop_slot, timezone, with_quantities
+        )
+
+    def find_next_available_rental(self, duration, qty=1, after=None, limit=1, timezone=None):
+        return self.env["website.rentals.scheduling"].find_next_available(
+            self, duration, qty, after, limit, timezone
         )
 
     def shortest_price_rule(self):
@@ -29,11 +64,5 @@ class Product(models.Model):
         This is used as an interval for generating pricing rules in the
         scheduling helper.
         """
-        return self.env["rental.pricing"].search(
-            [
-                ("id", "in", self.rental_pricing_ids.ids),
-                ("unit", "=", "hour")
-            ],
-            order="duration asc",
-            limit=1,
-        )
+        rule = self.env["website.rentals.scheduling"].get_product_profile(self)["hourly_rule"]
+        return self.env["rental.pricing"].browse(rule["id"] if rule else [])
@@ -1,5 +1,13 @@
 from odoo import models, fields
 
+# Template fields that are part of the rental profile, see SchedulingHelper.get_product_profile()
+PROFILE_FIELDS = {
+    "name",
+    "description_sale",
+    "preparation_time",
+    "rental_pricing_ids",
+}
+
 
 class ProductTemplate(models.Model):
     _inherit = "product.template"
@@ -7,3 +15,11 @@ class ProductTemplate(models.Model):
     rental_check_availability_on_all_products = fields.Boolean(
         string='Check availability on all products'
     )
+
+    def write(self, vals):
+        res = super().write(vals)
+
+        if PROFILE_FIELDS.intersection(vals):
+            self.env["website.rentals.scheduling"]._invalidate_product_profiles(self.product_variant_ids)
+
+        return res
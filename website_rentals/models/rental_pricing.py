@@ -13,6 +13,26 @@ class RentalPricing(models.Model):
         string="End Time"
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        self.env["website.rentals.scheduling"]._invalidate_product_profiles(rules.product_template_id.product_variant_ids)
+        return rules
+
+    def write(self, vals):
+        products = self.product_template_id.product_variant_ids
+        res = super().write(vals)
+        self.env["website.rentals.scheduling"]._invalidate_product_profiles(
+            products | self.product_template_id.product_variant_ids
+        )
+        return res
+
+    def unlink(self):
+        products = self.product_template_id.product_variant_ids
+        res = super().unlink()
+        self.env["website.rentals.scheduling"]._invalidate_product_profiles(products)
+        return res
+
     @api.constrains("start_time", "end_time")
     def check_time_range(self):
         for rule in self:
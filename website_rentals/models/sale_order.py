@@ -1,4 +1,4 @@
-from odoo import _, models, fields
+from odoo import _, models
 from odoo.exceptions import ValidationError
 import pytz
 
@@ -11,22 +11,35 @@ class SaleOrder(models.Model):
         rental_orders = self.filtered(lambda order: order.is_rental_order)
         rental_order_lines = rental_orders.mapped("order_line").filtered(lambda line: line.product_id.rent_ok)
 
-        for order_line in rental_order_lines:
+        # Nobody else can book the same products until this transaction ends
+        scheduling._lock_availability(rental_order_lines.mapped("product_id"))
+
+        # The cart holds of the orders don't count against their own availability
+        rental_order_lines.filtered("rental_hold_until").write({"rental_hold_until": False})
+
+        unavailable_lines = scheduling.get_unavailable_lines(rental_order_lines)
+        if unavailable_lines:
+            order_line = unavailable_lines[0]
             quantity_ordered = sum(rental_order_lines.filtered(lambda line: line.product_id == order_line.product_id).mapped("product_uom_qty"))
-            if not scheduling.can_rent(
-                order_line.product_id,
-                order_line.pickup_date,
-                order_line.return_date,
-                qty=quantity_ordered,
-            ):
-                raise ValidationError(
-                    _(
-                        f"{order_line.product_id.display_name} (qty {quantity_ordered}) is not available from {order_line.pickup_date} to {order_line.return_date}."
-                    )
+            raise ValidationError(
+                _(
+                    f"{order_line.product_id.display_name} (qty {quantity_ordered}) is not available from {order_line.pickup_date} to {order_line.return_date}."
                 )
+            )
 
         return super().action_confirm()
 
+    def write(self, vals):
+        if "state" not in vals and "is_rental_order" not in vals:
+            return super().write(vals)
+
+        # Lines that start or stop being active rentals are in either of the periods
+        periods = self.order_line._get_reservation_periods()
+        res = super().write(vals)
+        self.env["website.rentals.scheduling"]._invalidate_availability(periods + self.order_line._get_reservation_periods())
+
+        return res
+
     def _cart_update(self, product_id=None, line_id=None, add_qty=0, set_qty=0, **kwargs):
         res = super()._cart_update(product_id=product_id, line_id=line_id, add_qty=add_qty, set_qty=set_qty, **kwargs)
 
@@ -34,10 +47,17 @@ class SaleOrder(models.Model):
             if"pickup_date" not in kwargs and "return_date" not in kwargs:
                 raise ValidationError(_("Rental products must include a pickup and return date."))
 
-            self.env["sale.order.line"].browse(res["line_id"]).update({
+            line = self.env["sale.order.line"].browse(res["line_id"])
+            line.update({
                 "is_rental": True,
                 "pickup_date": kwargs["pickup_date"],
                 "return_date": kwargs["return_date"],
             })
+            line._hold_rental()
+        elif line_id:
+            # A held line has to fit its new quantity as well
+            line = self.env["sale.order.line"].browse(line_id).exists()
+            if line.rental_hold_until:
+                line._hold_rental()
 
         return res
@@ -1,6 +1,18 @@
-from odoo import models, fields
+from odoo import api, models, fields
 import datetime
 
+# Order line fields that affect the availability of rental products. The rental
+# status of the order is computed from the delivered and returned quantities.
+RESERVATION_FIELDS = {
+    "product_id",
+    "product_uom_qty",
+    "pickup_date",
+    "return_date",
+    "qty_delivered",
+    "qty_returned",
+    "rental_hold_until",
+}
+
 
 class SaleOrderLine(models.Model):
     _inherit = "sale.order.line"
@@ -15,17 +27,116 @@ class SaleOrderLine(models.Model):
         compute='_compute_pickup_date_no_timezone'
     )
 
-    def _compute_pickup_date_no_timezone(self):
-        lang = self.env.user.lang
-        if not lang:
-            lang = self.env.ref('base.user_admin').lang
-        lang_id = self.env['res.lang'].search([('code', '=', lang)], limit=1)
+    # Denormalized from the order so that reservation lookups don't need to join it
+    is_active_rental = fields.Boolean(
+        string="Active rental",
+        compute="_compute_is_active_rental",
+        store=True,
+    )
+
+    rental_hold_until = fields.Datetime(
+        string="Rental hold until",
+        help="The rental product of this cart line is reserved until the hold is released, "
+             "which happens shortly after this moment.",
+        copy=False,
+    )
+
+    def init(self):
+        super().init()
+        # Reservations of a product in a period, only the active rentals and cart holds are indexed
+        self.env.cr.execute(
+            """
+            CREATE INDEX IF NOT EXISTS sale_order_line_active_rental_index
+                ON sale_order_line (product_id, pickup_date, return_date)
+             WHERE is_active_rental
+            """
+        )
+        self.env.cr.execute(
+            """
+            CREATE INDEX IF NOT EXISTS sale_order_line_rental_hold_index
+                ON sale_order_line (product_id, pickup_date, return_date)
+             WHERE rental_hold_until IS NOT NULL
+            """
+        )
+
+    @api.depends("order_id.is_rental_order", "order_id.rental_status", "order_id.state")
+    def _compute_is_active_rental(self):
         for record in self:
-            if record.pickup_date:
-                record.pickup_date_no_timezone = record.pickup_date.replace(tzinfo=None).strftime(
-                    lang_id.date_format + ' ' + lang_id.time_format
-                )
-            if record.return_date:
-                record.return_date_no_timezone = record.return_date.replace(tzinfo=None).strftime(
-                    lang_id.date_format + ' ' + lang_id.time_format
-                )
+            order = record.order_id
+            record.is_active_rental = order.is_rental_order and (
+                order.rental_status in ("pickup", "return") or order.state == "sale"
+            )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env["website.rentals.scheduling"]._invalidate_availability(lines._get_reservation_periods())
+        return lines
+
+    def write(self, vals):
+        if not RESERVATION_FIELDS.intersection(vals):
+            return super().write(vals)
+
+        # Lines that start or stop reserving are in either of the periods
+        periods = self._get_reservation_periods()
+        res = super().write(vals)
+        self.env["website.rentals.scheduling"]._invalidate_availability(periods + self._get_reservation_periods())
+        return res
+
+    def unlink(self):
+        periods = self._get_reservation_periods()
+        res = super().unlink()
+        self.env["website.rentals.scheduling"]._invalidate_availability(periods)
+        return res
+
+    def _hold_rental(self):
+        """
+        Holds the rental products of cart lines for the number of minutes set
+        with website_rentals.cart_hold_minutes. Only lines whose period and
+        quantity are still available are held, the others are left without a
+        hold and are checked again when the order is confirmed.
+        """
+        scheduling = self.env["website.rentals.scheduling"]
+        hold_minutes = scheduling._get_cart_hold_minutes()
+        if hold_minutes <= 0 or not self:
+            return
+
+        # Nobody else can hold or book the same products between the check and the hold
+        scheduling._lock_availability(self.mapped("product_id"))
+
+        # A line doesn't count against its own availability
+        self.filtered("rental_hold_until").write({"rental_hold_until": False})
+
+        available_lines = self - scheduling.get_unavailable_lines(self)
+        available_lines.write({"rental_hold_until": fields.Datetime.now() + datetime.timedelta(minutes=hold_minutes)})
+
+    @api.model
+    def _release_expired_rental_holds(self):
+        """
+        Called by a scheduled action, releases the cart holds that have
+        expired. Held products stay reserved until then.
+        """
+        self.search([("rental_hold_until", "<=", fields.Datetime.now())]).write({"rental_hold_until": False})
+
+    def _get_reservation_periods(self):
+        """
+        (product, pickup date, return date) of every line that reserves its
+        product, used to invalidate availability. Quotations and cart lines
+        without a hold don't reserve anything, so changing them keeps the
+        cached availability of their products.
+        """
+        return [
+            (line.product_id, line.pickup_date, line.return_date)
+            for line in self
+            if line.is_active_rental or line.rental_hold_until
+        ]
+
+    def _compute_pickup_date_no_timezone(self):
+        formatting = self.env["website.rentals.formatting"]
+        lang_code = formatting._get_lang_code()
+
+        pickup_dates = formatting.format_datetimes(self.mapped("pickup_date"), lang_code)
+        return_dates = formatting.format_datetimes(self.mapped("return_date"), lang_code)
+        for record, pickup_date, return_date in zip(self, pickup_dates, return_dates):
+            record.pickup_date_no_timezone = pickup_date
+            record.return_date_no_timezone = return_date
@@ -1,8 +1,42 @@
 odoo.define("website_rentals.DateRangePicker", function (require) {
     const { Component } = owl;
     const { useState } = owl.hooks;
-    const { css } = owl.tags;
-    const useExternalXml = require("website_rentals.useExternalXml");
+    const { css, xml } = owl.tags;
+
+    const TEMPLATE = xml `
+        <div id="timeslots" class="row flex">
+            <div id="timeslot_start">
+                <t t-slot="start-label"/>
+
+                <div class="row flex card-container">
+                    <div
+                        t-att-class="'card ' + (state.selectedTimeslots.start === timeslot.id ? 'selected ' : '')  + (timeslot.disabled ? 'disabled ' : '')"
+                        t-on-click="selectStartTimeslot(timeslot)"
+                        t-foreach="filterStartTimeslots(state.timeslotsStart)"
+                        t-as="timeslot"
+                    >
+                        <p t-esc="timeslot.title"/>
+                        <p><small t-if="timeslot.subtitle" t-esc="timeslot.subtitle"/></p>
+                    </div>
+                </div>
+            </div>
+            <div id="timeslot_end">
+                <t t-slot="end-label"/>
+
+                <div class="row flex card-container">
+                    <div
+                        t-att-class="'card ' + (state.selectedTimeslots.end === timeslot.id ? 'selected ' : '') + (timeslot.disabled ? 'disabled ' : '')"
+                        t-on-click="selectEndTimeslot(timeslot)"
+                        t-foreach="filterEndTimeslots(state.timeslotsEnd)"
+                        t-as="timeslot"
+                    >
+                        <p t-esc="timeslot.title"/>
+                        <p><small t-if="timeslot.subtitle" t-esc="timeslot.subtitle"/></p>
+                    </div>
+                </div>
+            </div>
+        </div>
+    `;
 
     const STYLE = css `
         #timeslots #timeslot_start,
@@ -60,7 +94,7 @@ odoo.define("website_rentals.DateRangePicker", function (require) {
     `;
 
     class DateRangePicker extends Component {
-        static template = "website_rentals.DateRangePicker";
+        static template = TEMPLATE;
         static style = STYLE;
 
         state = useState({
@@ -73,10 +107,6 @@ odoo.define("website_rentals.DateRangePicker", function (require) {
             }
         })
 
-        setup() {
-            useExternalXml(["/website_rentals/static/src/components/DateRangePicker.xml"]);
-        }
-
         selectStartTimeslot(timeslot) {
             this.state.selectedTimeslots.start = timeslot.id;
             if(this.props.hasOwnProperty("onSelect")) this.props.onSelect();
@@ -1,12 +1,166 @@
 odoo.define("website_rentals.RentalWizard", function (require) {
     const { Component } = owl;
     const { useState, useRef } = owl.hooks;
-    const { css } = owl.tags;
+    const { css, xml } = owl.tags;
     const DateRangePicker = require("website_rentals.DateRangePicker");
-    const useCurrentTime = require("website_rentals.hooks.useCurrentTime");
-    const useExternalXml = require("website_rentals.useExternalXml");
+    const RentalRpc = require("website_rentals.RentalRpc");
+    const RentalWizardLoader = require("website_rentals.RentalWizardLoader");
     const wUtils = require("website.utils");
 
+    // Number of days, starting today, that the availability calendar is fetched for
+    const CALENDAR_DAYS = 60;
+
+    // Number of next available periods suggested when the selected period cannot be booked
+    const NEXT_AVAILABLE_SUGGESTIONS = 3;
+
+    // Milliseconds that responses are reused, quotes go stale quicker than the calendar
+    const QUOTE_TTL = 15000;
+    const CALENDAR_TTL = 60000;
+
+    // Milliseconds to wait for the quantity to settle before asking for the price
+    const QUANTITY_DEBOUNCE = 300;
+
+    // Longest wait of the slot expiry timer, browsers overflow on delays beyond ~24 days
+    const MAX_EXPIRY_DELAY = 24 * 60 * 60 * 1000;
+
+    const TEMPLATE = xml `
+        <div id="rental_wizard" class="modal">
+            <div class="modal-dialog modal-dialog-scrollable d-flex s_popup_size_full">
+                <div class="modal-content oe_structure">
+                    <div class="modal-body">
+                        <button
+                            type="button"
+                            class="close"
+                            data-dismiss="modal"
+                            t-on-click="cancel"
+                            style="position:absolute; right:12px; top:10px; z-index:9999;">
+                            <span
+                                role="img"
+                                aria-label="Close">×</span>
+                            <span class="sr-only">Close</span>
+                        </button>
+
+                        <section class="o_colored_level o_cc o_cc1">
+                            <form t-on-submit.prevent="submit" t-if="state.product">
+                                <div class="container">
+                                    <div class="row">
+                                        <h2 t-if="state.product.display_name" t-esc="state.product.display_name" class="w-full" style="display:block; padding:0 0 6px 0; margin:0;"/>
+                                        <p t-if="state.product.description_sale" t-esc="state.product.description_sale" class="w-full" style="display:block;"/>
+                                    </div>
+                                    <div class="row pt-4">
+                                        <div class="col-xs-12 col-sm-12 col-md-5 col-lg-5 col-xl-5"
+                                             style="padding: 0 !important; margin: 0 !important;">
+                                            <input
+                                                t-model="state.startDateInput"
+                                                t-on-change="onDateChange"
+                                                class="form-control"
+                                                name="pickup_date"
+                                                type="date"
+                                                autocomplete="off"
+                                                required="1"
+                                                t-att-min="minStartDate()"
+                                                t-att-disabled="state.loading"/>
+
+                                        </div>
+                                        <div class="col-xs-12 col-sm-12 col-md-1 col-lg-1 col-xl-1"
+                                        style="padding: 0 !important; margin: 0 !important;">
+                                            <p style="padding-top: 8px; padding-bottom: 8px; text-align:center;">to</p>
+                                        </div>
+                                        <div class="col-xs-12 col-sm-12 col-md-5 col-lg-5 col-xl-5"
+                                             style="padding: 0 !important; margin: 0 !important;">
+                                            <input
+                                                t-model="state.endDateInput"
+                                                t-on-change="onDateChange"
+                                                class="form-control"
+                                                name="return_date"
+                                                type="date"
+                                                autocomplete="off"
+                                                required="1"
+                                                t-att-min="state.startDateInput || minStartDate()"
+                                                t-att-disabled="!state.startDateInput || state.loading"/>
+                                        </div>
+                                    </div>
+
+                                    <!-- NOTE: Cannot use t-if here because it causes issues when trying to reference
+                                        subcomponents defined in this block. -->
+                                    <div t-att-class="(state.startDateInput &amp;&amp; state.endDateInput &amp;&amp; !state.loading) ? '' : 'd-none'">
+                                        <div t-if="!state.quantityAvailable" class="row">
+                                            <p class="text-danger pt-2">No availability.</p>
+                                        </div>
+                                        <t t-if="state.quantityAvailable">
+                                            <div id="product_qty" class="row flex">
+                                                <p class="w-full" style="margin-top:20px;"><strong>Quantity</strong></p>
+                                                <input
+                                                    t-model="state.quantity"
+                                                    t-on-change="onQtyChange"
+                                                    type="number"
+                                                    class="form-control quantity w-50"
+                                                    name="quantity"
+                                                    min="1"
+                                                    t-att-max="state.quantityAvailable"
+                                                    autocomplete="off"
+                                                    required="1"/>
+                                                <p class="w-50" style="margin-top:12px; padding-left: 10px;">
+                                                    (<span t-esc="state.quantityAvailable"/> Units Available)
+                                                </p>
+                                            </div>
+                                            <DateRangePicker t-ref="pickup-return-picker" onSelect="onTimeslotSelect.bind(state.this)">
+                                                <t t-set-slot="start-label">
+                                                    <h3><strong>Start</strong></h3>
+                                                    <p t-esc="startDate().format('DD.MM.YYYY')"/>
+                                                </t>
+                                                <t t-set-slot="end-label">
+                                                    <h3><strong>End</strong></h3>
+                                                    <p t-esc="endDate().format('DD.MM.YYYY')"/>
+                                                </t>
+                                            </DateRangePicker>
+                                        </t>
+                                    </div>
+
+                                <div class="row" t-if="state.price">
+                                    <p class="w-full"><strong>Price</strong></p>
+                                    <p class="w-full" t-esc="state.price"/>
+                                </div>
+                                <div class="row">
+                                    <p t-if="state.submitError" t-esc="state.submitError" class="text-danger"/>
+                                </div>
+                                <div class="row" t-if="state.suggestions.length">
+                                    <p class="w-full"><strong>Next available</strong></p>
+                                    <t t-foreach="state.suggestions" t-as="suggestion" t-key="suggestion_index">
+                                        <button
+                                            type="button"
+                                            class="btn btn-link p-0 w-full text-left"
+                                            t-on-click="selectSuggestion(suggestion)">
+                                            <t t-esc="suggestion.start.format('DD.MM.YYYY HH:mm')"/> - <t t-esc="suggestion.stop.format('DD.MM.YYYY HH:mm')"/>
+                                        </button>
+                                    </t>
+                                </div>
+                                </div>
+
+                                <hr/>
+                                <div class="row">
+                                    <button
+                                        class="btn btn-primary"
+                                        type="submit"
+                                        t-att-disabled="state.submitting || !state.quantityAvailable">
+                                        Add <i t-att-class="'fa fa-spinner fa-spin ' + (state.submitting ? '' : 'display-none')"/>
+                                    </button>
+                                    <button
+                                        t-on-click="cancel"
+                                        class="btn btn-link"
+                                        type="button">Cancel</button>
+                                </div>
+                            </form>
+                            <div t-else="">
+                                <i class="fa fa-spinner fa-spin" style="font-size: 24px"/>
+                            </div>
+                        </section>
+                    </div>
+                </div>
+            </div>
+        </div>
+    `;
+
     const STYLE = css `
         #rental_wizard {
             position: absolute;
@@ -46,7 +200,7 @@ odoo.define("website_rentals.RentalWizard", function (require) {
     `;
 
     class RentalWizard extends Component {
-        static template = "website_rentals.RentalWizard";
+        static template = TEMPLATE;
         static style = STYLE;
         static components = { DateRangePicker };
 
@@ -59,24 +213,50 @@ odoo.define("website_rentals.RentalWizard", function (require) {
             startDateInput: "",
             endDateInput: "",
             submitError: "",
+            suggestions: [],  // next available periods when the selected one cannot be booked
             submitting: false,
             loading: false,  // used to prevent a "flashing" effect while waiting on ajax calls
         });
 
+        // Per day availability, keyed by "YYYY-MM-DD". See fetchCalendar().
+        calendar = {};
+
+        // Timeslots of the last quote with the maximum quantity per timeslot. See applyTimeslots().
+        timeslots = {start: [], stop: [], start_qty: {}, stop_qty: {}};
+
+        // Quote waiting for the date range picker to be rendered, see patched()
+        pendingQuote = undefined;
+
+        // Timer pruning the next timeslot that can no longer be booked, see scheduleSlotExpiry()
+        expiryTimer = undefined;
+
+        // Timer fetching the price once the quantity has settled, see onQtyChange()
+        priceTimer = undefined;
+
         refs = {
             pickupReturnPicker: useRef("pickup-return-picker")
         };
 
-        time = useCurrentTime();
+        rpc = new RentalRpc((params, options) => this.env.services.rpc(params, options));
 
         constructor(parent, props) {
             super(parent, props)
             this.state.this = this;
-            this.fetchProduct(props.productId);
+            this.fetchProduct(props.productId).then(() => this.fetchCalendar());
         }
 
-        setup() {
-            useExternalXml(["/website_rentals/static/src/components/RentalWizard.xml"]);
+        patched() {
+            // The date range picker only exists once there is availability to show
+            if(this.pendingQuote !== undefined && this.refs.pickupReturnPicker.comp) {
+                this.applyQuote();
+            }
+        }
+
+        willUnmount() {
+            // Responses that are still on their way have nothing left to update
+            this.rpc.dropAll();
+            clearTimeout(this.expiryTimer);
+            clearTimeout(this.priceTimer);
         }
 
         /**
@@ -88,6 +268,7 @@ odoo.define("website_rentals.RentalWizard", function (require) {
             }
 
             this.state.submitError = ""
+            this.state.suggestions = [];
             this.state.submitting = true;
 
             this.canOrder().then(validator => {
@@ -95,6 +276,9 @@ odoo.define("website_rentals.RentalWizard", function (require) {
 
                 if (!validator.canOrder) {
                     this.state.submitError = validator.error;
+                    if (validator.unavailable) {
+                        this.fetchNextAvailable();
+                    }
                 } else {
                     return wUtils.sendRequest("/shop/cart/update", {
                         product_id: this.state.product.id,
@@ -103,7 +287,7 @@ odoo.define("website_rentals.RentalWizard", function (require) {
                         return_date: this.endDateFormatted(),
                     });
                 }
-            });
+            }).catch(RentalRpc.ignoreSuperseded);
         }
 
         /**
@@ -115,52 +299,160 @@ odoo.define("website_rentals.RentalWizard", function (require) {
 
         onDateChange() {
             this.state.loading = true;
+            this.state.suggestions = [];
+            clearTimeout(this.expiryTimer);
+
+            // Prices and timeslots asked for the previous dates no longer apply
+            clearTimeout(this.priceTimer);
+            this.rpc.drop("quote");
 
             if(moment(this.state.endDateInput) < moment(this.state.startDateInput)) {
                 this.state.endDateInput = this.state.startDateInput;
             }
 
-            this.fetchQuantityAvailable().then(() => {
-                // Even if quantities are available on the given day, gotta
-                // check that there are pickup timeslots available. This is
-                // passed to fetchTimeslots() as a callback.
-                let checkTimeslots = () => {
-                    if(!this.refs.pickupReturnPicker.comp || !this.refs.pickupReturnPicker.comp.state.timeslotsStart.length) {
-                        this.state.quantityAvailable = 0;
-                    }
-                    this.state.loading = false;
-                };
+            // No need to ask the server when the calendar already tells us nothing can be booked
+            if(this.isUnavailableInCalendar()) {
+                this.state.quantityAvailable = 0;
+                this.state.price = undefined;
+                this.state.loading = false;
+                return;
+            }
 
-                // This is a hack because I cannot find a way in OWL to
-                // do the equivalant of useEffect in React (wait until
-                // the next "cycle" has passed and the view has been
-                // updated).
-                //
-                // This has to be done because we need to wait until the
-                // pickupReturnPicker has been rendered before moving on
-                // from here.
-                if(this.state.quantityAvailable && !this.refs.pickupReturnPicker.comp) {
-                    const waiter = setInterval(() => {
-                        if(this.refs.pickupReturnPicker.comp) {
-                            this.fetchTimeslots().then(checkTimeslots);
-                            this.fetchPrice();
-                            clearInterval(waiter);
-                        }
-                    }, 5)
-                } else {
-                    this.fetchTimeslots().then(checkTimeslots);
-                    this.fetchPrice();
+            // A newer date change takes over the loading state of a superseded one
+            this.fetchQuote(false).then(quote => {
+                this.state.quantityAvailable = quote ? quote.available_qty : undefined;
+                this.state.price = undefined;
+                this.pendingQuote = quote || null;
+
+                // When the date range picker still has to be rendered, patched() applies the quote
+                if(!this.state.quantityAvailable || this.refs.pickupReturnPicker.comp) {
+                    this.applyQuote();
                 }
+            }, error => {
+                RentalRpc.ignoreSuperseded(error);
+            }).catch(error => {
+                this.state.loading = false;
+                throw error;
             });
         }
 
+        /**
+         * Applies the timeslots of the quote fetched for the selected dates.
+         */
+        applyQuote() {
+            const quote = this.pendingQuote;
+            this.pendingQuote = undefined;
+
+            // Even if quantities are available on the given day, gotta
+            // check that there are pickup timeslots available.
+            this.setTimeslots(quote);
+            if(!this.refs.pickupReturnPicker.comp || !this.refs.pickupReturnPicker.comp.state.timeslotsStart.length) {
+                this.state.quantityAvailable = 0;
+            }
+            this.state.loading = false;
+
+            this.scheduleSlotExpiry();
+        }
+
+        /**
+         * Moment after which a timeslot can no longer be booked, for start
+         * timeslots this takes the preparation time into account.
+         */
+        timeslotExpiry(dateInput, time, preparationTime = 0) {
+            return moment(`${dateInput} ${time}`).subtract(preparationTime, "hours");
+        }
+
+        /**
+         * Wakes up once the first of the shown timeslots can no longer be
+         * booked, instead of keeping track of the current time.
+         */
+        scheduleSlotExpiry() {
+            clearTimeout(this.expiryTimer);
+            this.expiryTimer = undefined;
+
+            const now = moment();
+            const preparationTime = this.state.product.preparation_time || 0;
+            const expiries = this.timeslots.start.map(time => this.timeslotExpiry(this.state.startDateInput, time, preparationTime))
+                .concat(this.timeslots.stop.map(time => this.timeslotExpiry(this.state.endDateInput, time)))
+                .filter(expiry => expiry >= now);
+
+            if(!expiries.length) {
+                return;
+            }
+
+            const delay = Math.min(moment.min(expiries).diff(now) + 1000, MAX_EXPIRY_DELAY);
+            this.expiryTimer = setTimeout(() => this.pruneExpiredTimeslots(), delay);
+        }
+
+        /**
+         * Removes the timeslots that can no longer be booked, like the server
+         * would leave them out now.
+         */
+        pruneExpiredTimeslots() {
+            const now = moment();
+            const preparationTime = this.state.product.preparation_time || 0;
+
+            this.timeslots.start = this.timeslots.start.filter(
+                time => this.timeslotExpiry(this.state.startDateInput, time, preparationTime) >= now
+            );
+            this.timeslots.stop = this.timeslots.stop.filter(
+                time => this.timeslotExpiry(this.state.endDateInput, time) >= now
+            );
+            this.applyTimeslots();
+
+            const pickupReturnPicker = this.refs.pickupReturnPicker.comp;
+            if(pickupReturnPicker && !pickupReturnPicker.state.timeslotsStart.length) {
+                this.state.quantityAvailable = 0;
+            }
+            if(!this.startDate(true).isValid() || !this.endDate(true).isValid()) {
+                this.state.price = undefined;
+            }
+
+            this.scheduleSlotExpiry();
+        }
+
+        /**
+         * First day that can be picked, taking the preparation time into account.
+         */
+        minStartDate() {
+            return moment().add(this.state.product.preparation_time || 0, "hours").format("YYYY-MM-DD");
+        }
+
         onQtyChange() {
-            this.fetchPrice();
+            // The timeslots come with their available quantity, no need to ask the server again
+            this.applyTimeslots();
+            this.state.price = undefined;
+
+            // Waits for the quantity to settle before asking for the price
+            clearTimeout(this.priceTimer);
+            this.priceTimer = setTimeout(() => this.fetchPrice(), QUANTITY_DEBOUNCE);
+        }
+
+        /**
+         * Fetches the price of the selected timeslots and quantity, if any.
+         */
+        fetchPrice() {
+            if(!this.startDate(true).isValid() || !this.endDate(true).isValid() || !this.state.quantity) {
+                this.state.price = undefined;
+                return;
+            }
+
+            this.fetchQuote().then(quote => {
+                this.state.price = quote ? quote.price : undefined;
+            }).catch(RentalRpc.ignoreSuperseded);
         }
 
         onTimeslotSelect() {
-            this.fetchTimeslotsEnd();
-            this.fetchPrice();
+            // Nothing to fetch until a start timeslot is selected, e.g. when the picker has been reset
+            if(!this.startDate(true).isValid()) {
+                this.state.price = undefined;
+                return;
+            }
+
+            this.fetchQuote().then(quote => {
+                this.setTimeslotsEnd(quote);
+                this.state.price = quote ? quote.price : undefined;
+            }).catch(RentalRpc.ignoreSuperseded);
         }
 
         /**
@@ -178,188 +470,236 @@ odoo.define("website_rentals.RentalWizard", function (require) {
          * Checks if it's possible to order this product.
          */
         canOrder() {
-            return new Promise(resolve => {
-                if(!this.refs.pickupReturnPicker.comp.findSelectedStart() || !this.refs.pickupReturnPicker.comp.findSelectedEnd()) {
-                    resolve({canOrder: false, error: "Please select a pickup and return time."});
-                    return;
-                }
+            if(!this.refs.pickupReturnPicker.comp.findSelectedStart() || !this.refs.pickupReturnPicker.comp.findSelectedEnd()) {
+                return Promise.resolve({canOrder: false, error: "Please select a pickup and return time."});
+            }
 
-                this.env.services.rpc({
-                    route: "/website/rentals/can_rent",
-                    params: {
-                        product_id: this.state.product.id,
-                        start_date: this.startDate(),
-                        stop_date: this.endDate(),
-                    }
-                }).then(res => {
-                    resolve({
-                        canOrder: res,
-                        error: !res ? "Date range is not available right now. Please try another date." : false
-                    });
-                });
+            // Never cached, this is the final check before adding to the cart
+            return this.rpc.call("/website/rentals/can_rent", {
+                product_id: this.state.product.id,
+                start_date: this.startDate(),
+                stop_date: this.endDate(),
+            }, {channel: "can_rent"}).then(res => {
+                return {
+                    canOrder: res,
+                    unavailable: !res,
+                    error: !res ? "Date range is not available right now. Please try another date." : false
+                };
             });
         }
 
-        fetchProduct(productId) {
-            return new Promise(resolve => {
-                this.env.services.rpc({
-                    route: "/website/rentals/get_product",
-                    params: {
-                        product_id: productId,
-                    }
-                }).then(res => {
-                    if (res) this.state.product = res[0];
-                    resolve();
-                });
-            });
+        /**
+         * Checks the availability calendar for a selected date range that
+         * cannot be booked. Days outside of the calendar are never considered
+         * unavailable, those are left to the server.
+         *
+         * A single day is unavailable when it has no start timeslots, a longer
+         * range when any day in between the start and end is fully booked.
+         */
+        isUnavailableInCalendar() {
+            if(!this.state.startDateInput || !this.state.endDateInput) {
+                return false;
+            }
+
+            if(this.onSameDay()) {
+                const day = this.calendar[this.state.startDateInput];
+                return !!day && !day.start_timeslots;
+            }
+
+            const day = this.startDate().add(1, "days");
+            while(day < this.endDate()) {
+                const availability = this.calendar[day.format("YYYY-MM-DD")];
+                if(availability && availability.available_qty < this.state.quantity) {
+                    return true;
+                }
+                day.add(1, "days");
+            }
+
+            return false;
         }
 
-        fetchPrice() {
+        /**
+         * Fetches the availability of the upcoming days in a single call.
+         */
+        fetchCalendar() {
             return new Promise(resolve => {
-                if(!this.state.product.id || !this.startDate(true).isValid() || !this.endDate(true).isValid() || !this.state.quantity) {
-                    this.state.price = undefined;
+                if(!this.state.product) {
                     resolve();
                     return;
                 }
 
-                this.env.services.rpc({
-                    route: "/website/rentals/get_price",
-                    params: {
-                        product_id: this.state.product.id,
-                        start_date: this.startDateFormatted(),
-                        stop_date: this.endDateFormatted(),
-                        qty: this.state.quantity,
-                    }
-                }).then(res => {
-                    this.state.price = res;
+                this.rpc.call("/website/rentals/availability_calendar", {
+                    product_id: this.state.product.id,
+                    start_date: moment().format("YYYY-MM-DD"),
+                    stop_date: moment().add(CALENDAR_DAYS - 1, "days").format("YYYY-MM-DD"),
+                    quantity: 1,
+                }, {ttl: CALENDAR_TTL}).then(res => {
+                    this.calendar = res || {};
                     resolve();
                 });
             });
         }
 
-        fetchQuantityAvailable() {
-            return new Promise(resolve => {
-                if (!(this.state.startDateInput && this.state.endDateInput)) {
-                    this.state.quantityAvailable = undefined;
-                    resolve();
-                    return;
-                }
+        /**
+         * Fetches the rental profile of the product. This is a plain GET
+         * request so that the browser can reuse the cached profile.
+         */
+        fetchProduct(productId) {
+            const lang = (document.documentElement.getAttribute("lang") || "").replace("-", "_");
+            const url = `/website/rentals/product/${productId}` + (lang ? `?lang=${encodeURIComponent(lang)}` : "");
 
-                this.env.services.rpc({
-                    route: "/website/rentals/get_available_rental_qty",
-                    params: {
-                        product_id: this.state.product.id,
-                        start_date: this.startDate(),
-                        stop_date: this.endDate(),
-                    }
-                }).then(res => {
-                    this.state.quantityAvailable = res;
-                    resolve();
+            return fetch(url, {credentials: "same-origin"})
+                .then(res => res.ok ? res.json() : undefined)
+                .then(product => {
+                    if (product) this.state.product = product;
                 });
-            });
         }
 
-        fetchTimeslots() {
-            return new Promise(resolve => {
-                // Not possible to set timeslots without an initialized date range picker component
-                const pickupReturnPicker = this.refs.pickupReturnPicker.comp;
-                if(!pickupReturnPicker) {
-                    resolve();
-                    return;
-                }
+        /**
+         * Fetches the available quantity, timeslots and price for the selected
+         * dates in a single call. The selected timeslots are sent along unless
+         * useSelection is false, e.g. when the dates have just changed.
+         *
+         * Quotes of date changes and of selections are made on their own
+         * channels, so that picking a timeslot never supersedes the quote of a
+         * date change. A newer quote on the same channel supersedes any quote
+         * that is still on its way, which is then rejected with Superseded.
+         */
+        fetchQuote(useSelection = true) {
+            if (!this.state.product || !(this.state.startDateInput && this.state.endDateInput)) {
+                return Promise.resolve(undefined);
+            }
 
-                // Users need to set start and end dates before timeslots can be set
-                if (!(this.state.startDateInput && this.state.endDateInput)) {
-                    pickupReturnPicker.state.timeslotsStart = [];
-                    pickupReturnPicker.state.timeslotsEnd = [];
-                    resolve();
-                    return;
+            const pickupReturnPicker = this.refs.pickupReturnPicker.comp;
+            const params = {
+                product_id: this.state.product.id,
+                start_date: this.state.startDateInput,
+                stop_date: this.state.endDateInput,
+                quantity: this.state.quantity,
+                with_quantities: true,
+            };
+
+            if(useSelection && pickupReturnPicker && pickupReturnPicker.findSelectedStart()) {
+                params.start_slot = this.startDateFormatted();
+                if(pickupReturnPicker.findSelectedEnd()) {
+                    params.stop_slot = this.endDateFormatted();
                 }
+            }
 
-                pickupReturnPicker.state.selectedTimeslot = undefined;
-
-                this.env.services.rpc({
-                    route: "/website/rentals/get_rental_hourly_timeslots",
-                    params: {
-                        product_id: this.state.product.id,
-                        start_date: this.state.startDateInput,
-                        stop_date: this.state.endDateInput,
-                        quantity: this.state.quantity,
-                    }
-                }).then(res => {
-                    if(!res) {
-                        resolve();
-                        return;
-                    }
+            const channel = useSelection ? "quote" : "dates";
+            return this.rpc.call("/website/rentals/quote", params, {ttl: QUOTE_TTL, channel: channel});
+        }
 
-                    pickupReturnPicker.state.timeslotsStart = res.start.map(timeStr => {
-                        return {
-                            id: `${this.state.startDateInput}${timeStr}`,
-                            title: timeStr,
-                            hour: Number(timeStr.split(":")[0]),
-                            minutes: Number(timeStr.split(":")[1]),
-                        };
-                    });
+        /**
+         * Fetches the first periods after the selected start that are as long
+         * as the selected period and can be booked, to suggest instead.
+         */
+        fetchNextAvailable() {
+            const duration = this.endDate(true).diff(this.startDate(true), "hours", true);
+            if(!this.state.product || !(duration > 0)) {
+                return Promise.resolve();
+            }
 
-                    pickupReturnPicker.state.timeslotsEnd = res.stop.map(timeStr => {
-                        return {
-                            id: `${this.state.endDateInput}${timeStr}`,
-                            title: timeStr,
-                            hour: Number(timeStr.split(":")[0]),
-                            minutes: Number(timeStr.split(":")[1]),
-                        };
-                    });
+            return this.rpc.call("/website/rentals/next_available", {
+                product_id: this.state.product.id,
+                duration: duration,
+                quantity: this.state.quantity,
+                after: this.startDateFormatted(),
+                limit: NEXT_AVAILABLE_SUGGESTIONS,
+            }, {ttl: QUOTE_TTL, channel: "next_available"}).then(res => {
+                this.state.suggestions = (res || []).map(period => {
+                    return {
+                        start: moment(period.start),
+                        stop: moment(period.stop),
+                    };
+                });
+            }).catch(RentalRpc.ignoreSuperseded);
+        }
 
-                    pickupReturnPicker.reset();
-                    pickupReturnPicker.state.sameDay = this.onSameDay();
+        /**
+         * Switches the dates to a suggested period, the timeslots still have to be selected.
+         */
+        selectSuggestion(suggestion) {
+            this.state.startDateInput = suggestion.start.format("YYYY-MM-DD");
+            this.state.endDateInput = suggestion.stop.format("YYYY-MM-DD");
+            this.state.submitError = "";
+            this.onDateChange();
+        }
 
-                    resolve();
-                });
+        /**
+         * Converts a list of "HH:mm" strings from the server into timeslots for a day.
+         */
+        toTimeslots(dateInput, times) {
+            return times.map(timeStr => {
+                return {
+                    id: `${dateInput}${timeStr}`,
+                    title: timeStr,
+                    hour: Number(timeStr.split(":")[0]),
+                    minutes: Number(timeStr.split(":")[1]),
+                };
             });
         }
 
-        fetchTimeslotsEnd() {
-            return new Promise(resolve => {
-                // Not possible to set timeslots without an initialized date range picker component
-                const pickupReturnPicker = this.refs.pickupReturnPicker.comp;
-                if(!pickupReturnPicker) {
-                    resolve();
-                    return;
-                }
+        /**
+         * Fills the date range picker with the start and stop timeslots of a quote.
+         */
+        setTimeslots(quote) {
+            // Not possible to set timeslots without an initialized date range picker component
+            const pickupReturnPicker = this.refs.pickupReturnPicker.comp;
+            if(!pickupReturnPicker || !quote) {
+                return;
+            }
 
-                if (pickupReturnPicker.state.selectedTimeslots.start) {
-                    this.env.services.rpc({
-                        route: "/website/rentals/get_rental_hourly_timeslots",
-                        params: {
-                            product_id: this.state.product.id,
-                            start_date: pickupReturnPicker.state.selectedTimeslots.start,
-                            stop_date: this.state.endDateInput,
-                            quantity: this.state.quantity,
-                            include_start: false,
-                            include_stop: true,
-                        }
-                    }).then(res => {
-                        if(!res) {
-                            resolve();
-                            return;
-                        }
-
-                        pickupReturnPicker.state.timeslotsEnd = res.stop.map(timeStr => {
-                            return {
-                                id: `${this.state.endDateInput}${timeStr}`,
-                                title: timeStr,
-                                hour: Number(timeStr.split(":")[0]),
-                                minutes: Number(timeStr.split(":")[1]),
-                            };
-                        });
-
-    //                    pickupReturnPicker.reset();
-                        pickupReturnPicker.state.sameDay = this.onSameDay();
-
-                        resolve();
-                    });
-                }
-            });
+            this.timeslots = {
+                start: quote.start,
+                stop: quote.stop,
+                start_qty: quote.start_qty || {},
+                stop_qty: quote.stop_qty || {},
+            };
+
+            pickupReturnPicker.reset();
+            pickupReturnPicker.state.sameDay = this.onSameDay();
+            this.applyTimeslots();
+        }
+
+        /**
+         * Updates the stop timeslots after a start timeslot has been selected.
+         */
+        setTimeslotsEnd(quote) {
+            const pickupReturnPicker = this.refs.pickupReturnPicker.comp;
+            if(!pickupReturnPicker || !quote || !pickupReturnPicker.state.selectedTimeslots.start) {
+                return;
+            }
+
+            this.timeslots.stop = quote.stop;
+            this.timeslots.stop_qty = quote.stop_qty || {};
+
+            pickupReturnPicker.state.sameDay = this.onSameDay();
+            this.applyTimeslots();
+        }
+
+        /**
+         * Shows the timeslots of the last quote that can be booked for the
+         * selected quantity. Without a selected start timeslot, start and stop
+         * timeslots are only shown when both are left.
+         */
+        applyTimeslots() {
+            const pickupReturnPicker = this.refs.pickupReturnPicker.comp;
+            if(!pickupReturnPicker) {
+                return;
+            }
+
+            const quantity = Number(this.state.quantity) || 0;
+            let start = this.timeslots.start.filter(time => this.timeslots.start_qty[time] >= quantity);
+            let stop = this.timeslots.stop.filter(time => this.timeslots.stop_qty[time] >= quantity);
+
+            if(!pickupReturnPicker.state.selectedTimeslots.start && (!start.length || !stop.length)) {
+                start = [];
+                stop = [];
+            }
+
+            pickupReturnPicker.state.timeslotsStart = this.toTimeslots(this.state.startDateInput, start);
+            pickupReturnPicker.state.timeslotsEnd = this.toTimeslots(this.state.endDateInput, stop);
         }
 
         /**
@@ -399,5 +739,8 @@ odoo.define("website_rentals.RentalWizard", function (require) {
         }
     }
 
+    // The wizard is loaded on demand, see RentalWizardLoader
+    RentalWizardLoader.register(RentalWizard);
+
     return RentalWizard;
 });
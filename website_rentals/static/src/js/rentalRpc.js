@@ -0,0 +1,177 @@
+odoo.define("website_rentals.RentalRpc", function(require) {
+    // Number of responses kept in the cache, shared by all wizards on the page
+    const CACHE_SIZE = 50;
+
+    const cache = new Map();
+
+    /**
+     * Rejection of a call that has been superseded by a newer call on its
+     * channel, or dropped with its channel.
+     */
+    class Superseded extends Error {
+        constructor() {
+            super("Superseded by a newer call");
+            this.name = "Superseded";
+        }
+    }
+
+    /**
+     * Wraps the rpc service of a component for the rental routes.
+     *
+     * Responses are cached for a short time, keyed by route and parameters,
+     * so going back and forth between dates or quantities doesn't ask the
+     * server again. Identical cached calls that are still running share a
+     * single request.
+     *
+     * Calls can be made on a channel, a new call on the same channel
+     * supersedes the previous one: it is rejected with Superseded so that its
+     * response can never overwrite newer state, and its request is aborted
+     * when nothing else is waiting for it. Callers that don't need to clean up
+     * after a superseded call can ignore it with ignoreSuperseded.
+     *
+     * Usage:
+     *
+     *     const RentalRpc = require("website_rentals.RentalRpc");
+     *
+     *     this.rpc = new RentalRpc((params, options) => this.env.services.rpc(params, options));
+     *     this.rpc.call("/website/rentals/quote", params, {ttl: 15000, channel: "quote"})
+     *         .then(...)
+     *         .catch(RentalRpc.ignoreSuperseded);
+     */
+    class RentalRpc {
+        /**
+         * Rejection handler letting every error through except Superseded.
+         */
+        static ignoreSuperseded(error) {
+            if(!(error instanceof Superseded)) {
+                throw error;
+            }
+        }
+
+        constructor(rpc) {
+            this.rpc = rpc;
+            this.channels = {};
+        }
+
+        /**
+         * Calls a route, with the response taken from the cache when the same
+         * call was made less than ttl milliseconds ago. Superseded calls are
+         * rejected with Superseded.
+         */
+        call(route, params, {ttl = 0, channel = undefined} = {}) {
+            const key = JSON.stringify([route, params]);
+            const entry = this._getEntry(key, route, params, ttl);
+
+            return new Promise((resolve, reject) => {
+                const ticket = {entry: entry, dropped: false, reject: reject};
+                entry.waiting++;
+
+                if(channel) {
+                    this.drop(channel);
+                    this.channels[channel] = ticket;
+                }
+
+                entry.request.then(result => {
+                    if(this._release(ticket, channel)) resolve(result);
+                }, error => {
+                    if(this._release(ticket, channel)) reject(error);
+                });
+            });
+        }
+
+        /**
+         * Drops the call of a channel, if any, e.g. when its response no
+         * longer applies.
+         */
+        drop(channel) {
+            if(this.channels[channel]) {
+                this._drop(this.channels[channel]);
+                delete this.channels[channel];
+            }
+        }
+
+        /**
+         * Drops the calls of all channels, e.g. when the component goes away.
+         */
+        dropAll() {
+            Object.keys(this.channels).forEach(channel => this.drop(channel));
+        }
+
+        _getEntry(key, route, params, ttl) {
+            let entry = cache.get(key);
+            if(entry && entry.expires > Date.now()) {
+                // Most recently used entries come last
+                cache.delete(key);
+                cache.set(key, entry);
+                return entry;
+            }
+
+            entry = {
+                request: this.rpc({route: route, params: params}, {shadow: true}),
+                expires: Date.now() + ttl,
+                waiting: 0,
+                done: false,
+            };
+
+            const settle = () => entry.done = true;
+            entry.request.then(settle, () => {
+                settle();
+                // Failures are never reused
+                if(cache.get(key) === entry) cache.delete(key);
+            });
+
+            if(ttl > 0) {
+                cache.delete(key);
+                cache.set(key, entry);
+                while(cache.size > CACHE_SIZE) {
+                    cache.delete(cache.keys().next().value);
+                }
+            } else {
+                cache.delete(key);
+            }
+
+            return entry;
+        }
+
+        /**
+         * Called when the request of a call is done, returns whether the
+         * call is still current.
+         */
+        _release(ticket, channel) {
+            if(ticket.dropped) {
+                return false;
+            }
+
+            ticket.entry.waiting--;
+            if(channel && this.channels[channel] === ticket) {
+                delete this.channels[channel];
+            }
+            return true;
+        }
+
+        _drop(ticket) {
+            if(ticket.dropped) {
+                return;
+            }
+
+            ticket.dropped = true;
+            ticket.entry.waiting--;
+            ticket.reject(new Superseded());
+
+            const entry = ticket.entry;
+            if(!entry.done && !entry.waiting && typeof entry.request.abort === "function") {
+                for(const [key, cached] of cache) {
+                    if(cached === entry) {
+                        cache.delete(key);
+                        break;
+                    }
+                }
+                entry.request.abort();
+            }
+        }
+    }
+
+    RentalRpc.Superseded = Superseded;
+
+    return RentalRpc;
+});
@@ -0,0 +1,48 @@
+odoo.define("website_rentals.RentalWizardLoader", function (require) {
+    const ajax = require("web.ajax");
+
+    let registerWizard;
+    const wizard = new Promise(resolve => registerWizard = resolve);
+    let loading = undefined;
+
+    /**
+     * Loads the rental wizard bundle on demand. Its code and templates aren't
+     * part of the frontend assets so product pages don't pay for them until
+     * the wizard is opened.
+     *
+     * The bundle registers the RentalWizard component here once it has been
+     * defined, which resolves load().
+     *
+     * Usage:
+     *
+     *     const RentalWizardLoader = require("website_rentals.RentalWizardLoader");
+     *
+     *     RentalWizardLoader.load().then(RentalWizard => mount(RentalWizard, {...}));
+     */
+    return {
+        /**
+         * Loads the bundle once, resolving with the RentalWizard component.
+         */
+        load() {
+            if(!loading) {
+                loading = ajax.loadLibs(
+                    {assetLibs: ["website_rentals.compiled_assets_rental_wizard"]},
+                    undefined,
+                    "/web_editor/public_render_template",
+                ).then(() => wizard, error => {
+                    // Try again on the next click
+                    loading = undefined;
+                    return Promise.reject(error);
+                });
+            }
+            return loading;
+        },
+
+        /**
+         * Called by the wizard bundle with the RentalWizard component.
+         */
+        register(RentalWizard) {
+            registerWizard(RentalWizard);
+        },
+    };
+});
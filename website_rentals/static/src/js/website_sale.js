@@ -1,7 +1,7 @@
 odoo.define("website_rentals.WebsiteSale", function (require) {
 
     const { mount } = owl;
-    const RentalWizard = require("website_rentals.RentalWizard");
+    const RentalWizardLoader = require("website_rentals.RentalWizardLoader");
     const WebsiteSale = require("web.public.widget").registry.WebsiteSale;
 
     return WebsiteSale.include({
@@ -10,13 +10,15 @@ odoo.define("website_rentals.WebsiteSale", function (require) {
         }),
 
         _openCheckAvailability() {
-            mount(
-                RentalWizard,
-                {
-                    target: document.querySelector("#check_availability_wizard"),
-                    props: {productId: this._getProductId(this.$el)}
-                }
-            )
+            return RentalWizardLoader.load().then(RentalWizard => {
+                mount(
+                    RentalWizard,
+                    {
+                        target: document.querySelector("#check_availability_wizard"),
+                        props: {productId: this._getProductId(this.$el)}
+                    }
+                );
+            });
         },
     });
 });
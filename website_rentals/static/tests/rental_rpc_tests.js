@@ -0,0 +1,70 @@
+odoo.define("website_rentals.rental_rpc_tests", function (require) {
+    const RentalRpc = require("website_rentals.RentalRpc");
+
+    /**
+     * Rpc that answers once told to, with the params of each call.
+     */
+    function makeRpc() {
+        const calls = [];
+        const rpc = (query) => {
+            let resolve;
+            const request = new Promise(r => resolve = r);
+            const call = {params: query.params, aborted: false, resolve: () => resolve(query.params)};
+            request.abort = () => call.aborted = true;
+            calls.push(call);
+            return request;
+        };
+        return {rpc: new RentalRpc(rpc), calls: calls};
+    }
+
+    QUnit.module("website_rentals", {}, function () {
+        QUnit.module("RentalRpc");
+
+        QUnit.test("a price quote does not supersede the quote of a date change", async function (assert) {
+            const {rpc, calls} = makeRpc();
+            const state = {loading: true};
+
+            // What the wizard does when the dates change while a price is still debounced
+            const dates = rpc.call("/website/rentals/quote", {start_date: "2022-03-14", case: 1}, {ttl: 1000, channel: "dates"})
+                .then(() => state.loading = false);
+            const price = rpc.call("/website/rentals/quote", {start_date: "2022-03-14", start_slot: "08:00", case: 1}, {ttl: 1000, channel: "quote"});
+
+            calls.forEach(call => call.resolve());
+            await Promise.all([dates, price]);
+
+            assert.notOk(state.loading, "the date change settled");
+            assert.notOk(calls[0].aborted);
+        });
+
+        QUnit.test("superseded calls are rejected", async function (assert) {
+            const {rpc, calls} = makeRpc();
+
+            const older = rpc.call("/website/rentals/quote", {case: 2, quantity: 1}, {channel: "quote"});
+            const newer = rpc.call("/website/rentals/quote", {case: 2, quantity: 2}, {channel: "quote"});
+
+            calls.forEach(call => call.resolve());
+
+            await older.then(() => assert.ok(false, "superseded call resolved"), error => {
+                assert.ok(error instanceof RentalRpc.Superseded);
+            });
+            assert.strictEqual((await newer).quantity, 2);
+            assert.ok(calls[0].aborted, "nothing else waited for the superseded request");
+        });
+
+        QUnit.test("dropping a channel rejects its call", async function (assert) {
+            const {rpc, calls} = makeRpc();
+            let ignored = false;
+
+            const call = rpc.call("/website/rentals/quote", {case: 3}, {channel: "quote"});
+            rpc.drop("quote");
+            rpc.drop("quote");
+
+            await call.catch(RentalRpc.ignoreSuperseded).then(() => ignored = true);
+            assert.ok(ignored);
+            assert.ok(calls[0].aborted);
+
+            const error = new Error("Network");
+            assert.throws(() => RentalRpc.ignoreSuperseded(error), /Network/, "other errors go through");
+        });
+    });
+});
@@ -1,4 +1,6 @@
+from . import test_benchmarks
 from . import test_helpers
+from . import test_js
 from . import test_rental_pricing
 from . import test_scheduling
 from . import test_timeslot_generation
@@ -0,0 +1,168 @@
+import datetime
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from odoo.tests import TransactionCase, tagged
+from odoo.addons.website_rentals.helpers.cache import availability_cache
+
+_logger = logging.getLogger(__name__)
+
+# The benchmarks can be tuned with these environment variables, e.g.
+#
+#     WEBSITE_RENTALS_BENCHMARK_SIZES=100,1000 odoo-bin -d bench -i website_rentals --test-tags website_rentals_benchmark
+#
+VARIANT_COUNTS = [int(count) for count in os.environ.get("WEBSITE_RENTALS_BENCHMARK_VARIANTS", "1,10,100").split(",")]
+RESERVATION_COUNTS = [int(count) for count in os.environ.get("WEBSITE_RENTALS_BENCHMARK_SIZES", "100,1000,10000,100000").split(",")]
+REPEATS = int(os.environ.get("WEBSITE_RENTALS_BENCHMARK_REPEATS", "5"))
+OUTPUT = os.environ.get("WEBSITE_RENTALS_BENCHMARK_OUTPUT", os.path.join(tempfile.gettempdir(), "website_rentals_benchmark.json"))
+
+# Number of order lines created per order when generating reservations
+LINES_PER_ORDER = 500
+
+
+@tagged("post_install", "-at_install", "-standard", "website_rentals_benchmark")
+class SchedulingBenchmarks(TransactionCase):
+    """
+    Times the scheduling helper against synthetic reservation datasets.
+
+    These are not run with the regular tests, use the website_rentals_benchmark
+    test tag. Wall-clock times and query counts of every operation are written
+    as JSON to WEBSITE_RENTALS_BENCHMARK_OUTPUT.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.scheduling = self.env["website.rentals.scheduling"]
+        self.random = random.Random(42)
+        self.today = datetime.datetime.combine(datetime.date.today(), datetime.time()) + datetime.timedelta(days=1)
+        self.partner = self.env["res.partner"].create({"name": "Benchmark Customer"})
+        self.results = []
+
+    def test_scheduling_benchmarks(self):
+        for variant_count in VARIANT_COUNTS:
+            template = self._create_template(variant_count)
+            product = template.product_variant_ids[0]
+            reservation_count = 0
+
+            # Reservations are added incrementally, every dataset builds on the previous one
+            for size in sorted(RESERVATION_COUNTS):
+                self._create_reservations(template.product_variant_ids, size - reservation_count)
+                reservation_count = size
+
+                for pooled in (False, True):
+                    template.rental_check_availability_on_all_products = pooled
+                    self._benchmark_dataset(product, variant_count, reservation_count, pooled)
+
+        with open(OUTPUT, "w") as output:
+            json.dump(self.results, output, indent=2)
+
+        _logger.info("Wrote %s scheduling benchmark results to %s", len(self.results), OUTPUT)
+
+    def _benchmark_dataset(self, product, variant_count, reservation_count, pooled):
+        start_date = self.today + datetime.timedelta(days=30, hours=9)
+        stop_date = start_date + datetime.timedelta(days=2)
+
+        # (setup, run) per operation, only run is timed and gets the result of setup
+        operations = {
+            "can_rent": (lambda: None, lambda _: self.scheduling.can_rent(product, start_date, stop_date, qty=1)),
+            "get_available_qty": (lambda: None, lambda _: self.scheduling.get_available_qty(product, start_date, stop_date)),
+            "get_rental_hourly_timeslots": (
+                lambda: None,
+                lambda _: self.scheduling.get_rental_hourly_timeslots(product, start_date, quantity=1),
+            ),
+            "action_confirm": (lambda: self._create_orders(product, 10, start_date, 1), lambda orders: orders.action_confirm()),
+        }
+
+        for operation, (setup, run) in operations.items():
+            timings, queries = [], []
+            for _ in range(REPEATS):
+                data = setup()
+                self.env["base"].flush()
+
+                # Measure the actual work, not the availability cache
+                availability_cache.clear()
+                self.env.invalidate_all()
+
+                query_count = self.env.cr.sql_log_count
+                started = time.perf_counter()
+                run(data)
+                timings.append(time.perf_counter() - started)
+                queries.append(self.env.cr.sql_log_count - query_count)
+
+            timings.sort()
+            self.results.append({
+                "operation": operation,
+                "variants": variant_count,
+                "reservations": reservation_count,
+                "pooled": pooled,
+                "repeats": REPEATS,
+                "median_seconds": timings[len(timings) // 2],
+                "max_seconds": timings[-1],
+                "queries": max(queries),
+            })
+
+    def _create_template(self, variant_count):
+        attribute = self.env["product.attribute"].create({
+            "name": f"Benchmark Size {variant_count}",
+            "create_variant": "always",
+            "value_ids": [(0, 0, {"name": f"Size {index}"}) for index in range(variant_count)],
+        })
+
+        template = self.env["product.template"].create({
+            "name": f"Benchmark Product {variant_count}",
+            "categ_id": self.env.ref("sale_renting.cat_renting").id,
+            "type": "product",
+            "rent_ok": True,
+            "preparation_time": 0.0,
+            "attribute_line_ids": [(0, 0, {
+                "attribute_id": attribute.id,
+                "value_ids": [(6, 0, attribute.value_ids.ids)],
+            })],
+            "rental_pricing_ids": [
+                (0, 0, {"duration": 1, "unit": "hour", "price": 10.0, "start_time": 8.0, "end_time": 18.0}),
+                (0, 0, {"duration": 1, "unit": "day", "price": 50.0, "start_time": 8.0, "end_time": 18.0}),
+            ],
+        })
+
+        for variant in template.product_variant_ids:
+            self.env["stock.change.product.qty"].create({
+                "product_id": variant.id,
+                "product_tmpl_id": template.id,
+                "new_quantity": 1000.0,
+            }).change_product_qty()
+
+        return template
+
+    def _create_reservations(self, products, count):
+        """Confirmed reservations spread randomly over the coming year."""
+        while count > 0:
+            batch = min(count, LINES_PER_ORDER)
+            order = self._create_orders(products, batch)
+            order.write({"state": "sale"})
+            count -= batch
+
+    def _create_orders(self, products, line_count, pickup_date=None, duration_hours=None):
+        """A draft rental order with line_count lines, randomly divided over the products."""
+        lines = []
+        for _ in range(line_count):
+            product = self.random.choice(products)
+            start_date = pickup_date or self.today + datetime.timedelta(hours=self.random.randrange(365 * 24))
+            lines.append((0, 0, {
+                "product_id": product.id,
+                "name": product.name,
+                "product_uom": product.uom_id.id,
+                "product_uom_qty": 1.0,
+                "is_rental": True,
+                "pickup_date": start_date,
+                "return_date": start_date + datetime.timedelta(hours=duration_hours or self.random.randint(1, 72)),
+            }))
+
+        return self.env["sale.order"].create({
+            "partner_id": self.partner.id,
+            "is_rental_order": True,
+            "order_line": lines,
+        })
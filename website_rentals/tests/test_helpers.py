@@ -61,3 +61,99 @@ class HelpersTests(TransactionCase):
         assert helpers.misc.float_range(6.5, 9.51) == [6.5, 7.5, 8.5, 9.5]
         assert helpers.misc.float_range(5.25, 7.10, step=0.25) == [5.25, 5.50, 5.75, 6.0, 6.25, 6.50, 6.75, 7.0]
         assert helpers.misc.float_range(5.6, 6.0, step=0.2) == [5.6, 5.8, 6.0]
+
+    def test_occupancy_timeline_peak(self):
+        timeline = helpers.occupancy.OccupancyTimeline([(8, 12, 1), (10, 14, 2), (20, 22, 0)])
+
+        assert timeline.peak(9, 11) == 3
+        assert timeline.peak(12, 16) == 2
+        assert timeline.peak(0, 8) == 0
+        assert timeline.peak(14, 20) == 0
+        assert timeline.peak(11, 11) == 3
+        assert timeline.peaks([(8, 10), (12, 14)]) == [1, 2]
+
+    def test_scheduling_context(self):
+        context = helpers.context.SchedulingContext("Europe/Brussels")
+
+        assert context.to_local(datetime.datetime(2021, 9, 10, 6, 30)) == datetime.datetime(2021, 9, 10, 8, 30)
+        assert context.to_utc("2021-09-10 08:30:00") == datetime.datetime(2021, 9, 10, 6, 30)
+        assert context.to_utc("2021-09-10T06:30:00.000Z") == datetime.datetime(2021, 9, 10, 6, 30)
+        assert context.to_utc(datetime.date(2021, 12, 1)) == datetime.datetime(2021, 11, 30, 23, 0)
+
+        # Unknown timezones fall back to UTC
+        assert helpers.context.SchedulingContext("Mars/Olympus").timezone == "UTC"
+        assert helpers.context.SchedulingContext().timezone == "UTC"
+
+    def test_slot_grid(self):
+        grid = helpers.slots.SlotGrid(8.0, 12.0, 2.0)
+
+        assert grid.start_times() == (480, 540, 600, 660, 720)
+        assert grid.start_times(same_day=True) == (480, 600, 720)
+        assert grid.stop_times(offset=600) == (720,)
+        assert grid.after(grid.start_times(), 545) == (600, 660, 720)
+
+        # Times that don't add up in floating point still end up on whole minutes
+        grid = helpers.slots.SlotGrid(6.1, 7.0, 0.3, step=6)
+        assert grid.times == (366, 372, 378, 384, 390, 396, 402, 408, 414, 420)
+        assert grid.stop_times(offset=366) == (384, 390, 396, 402, 408, 414, 420)
+
+        # Sub-hour timeslots, stop times follow the step from an unaligned start
+        grid = helpers.slots.SlotGrid(8.0, 9.0, 0.5, step=15)
+        assert grid.start_times() == (480, 495, 510, 525, 540)
+        assert grid.stop_times(offset=490) == (520, 535)
+
+        assert helpers.slots.get_grid(8.0, 12.0, 2.0) is helpers.slots.get_grid(8.0, 12.0, 2.0)
+
+    def test_format_datetimes(self):
+        formatting = self.env["website.rentals.formatting"]
+        lang = self.env["res.lang"]._lang_get("en_US")
+        expected = datetime.datetime(2022, 3, 14, 8, 30).strftime(f"{lang.date_format} {lang.time_format}")
+
+        assert formatting.format_datetime(datetime.datetime(2022, 3, 14, 8, 30), "en_US") == expected
+        assert formatting.format_datetimes([datetime.datetime(2022, 3, 14, 8, 30), False], "en_US") == [expected, False]
+
+        # Unknown languages fall back to the server format
+        assert formatting.format_datetime(datetime.datetime(2022, 3, 14, 8, 30), "xx_XX") == "2022-03-14 08:30:00"
+
+    def test_reservation_index(self):
+        index = helpers.occupancy.ReservationIndex([(8, 12, 1, 1), (10, 14, 2, 2), (20, 22, 1, 3)])
+
+        assert index.overlapping(12, 16) == [1, 2]
+        assert index.overlapping(14, 20) == [2, 3]
+        assert index.overlapping(15, 19) == []
+        assert index.peak(9, 11) == 3
+
+    def test_numpy_occupancy_timeline_matches_python(self):
+        if helpers.occupancy_numpy.numpy is None:
+            self.skipTest("numpy is not installed")
+
+        start = datetime.datetime(2022, 3, 1, 8)
+        hour = datetime.timedelta(hours=1)
+        intervals = [
+            (start, start + 4 * hour, 1),
+            (start + 2 * hour, start + 6 * hour, 2),
+            (start + 6 * hour, start + 6 * hour, 1),
+            (start + 9 * hour, start + 10 * hour, 3),
+        ]
+        windows = [(start + i * hour, start + (i + 2) * hour) for i in range(-1, 12)]
+
+        timeline = helpers.occupancy.OccupancyTimeline(intervals)
+        numpy_timeline = helpers.occupancy_numpy.NumpyOccupancyTimeline(intervals)
+
+        assert numpy_timeline.peaks(windows) == timeline.peaks(windows)
+        assert [numpy_timeline.reserved(*window) for window in windows] == [timeline.reserved(*window) for window in windows]
+        assert [numpy_timeline.level_at(window[0]) for window in windows] == [timeline.level_at(window[0]) for window in windows]
+
+    def test_occupancy_timeline_inverted_window(self):
+        intervals = [(8, 12, 1), (10, 14, 2), (20, 22, 1)]
+        engines = [helpers.occupancy.OccupancyTimeline]
+        if helpers.occupancy_numpy.numpy is not None:
+            engines.append(helpers.occupancy_numpy.NumpyOccupancyTimeline)
+
+        for engine in engines:
+            timeline = engine(intervals)
+
+            # An inverted window is the single moment at its start, never negative
+            assert timeline.reserved(16, 9) == 0
+            assert timeline.reserved(21, 9) == 1
+            assert timeline.reserved(11, 9) == timeline.reserved(11, 11) == 3
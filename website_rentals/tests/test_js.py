@@ -0,0 +1,7 @@
+from odoo.tests import HttpCase, tagged
+
+
+@tagged("post_install", "-at_install")
+class JsTests(HttpCase):
+    def test_rental_rpc(self):
+        self.browser_js("/web/tests?filter=website_rentals", "", "", login="admin", timeout=120)
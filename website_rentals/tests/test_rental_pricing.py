@@ -10,3 +10,35 @@ class RentalPricingTests(TransactionCase):
 
         with self.assertRaises(ValidationError):
             rule.end_time = rule.start_time - 2
+
+    def test_price_matches_rental_wizard(self):
+        product = self.env["product.product"].create(
+            {
+                "name": "New Meeting Room",
+                "categ_id": self.env.ref("sale_renting.cat_renting").id,
+                "type": "product",
+                "rent_ok": True,
+                "extra_hourly": 15.0,
+                "rental_pricing_ids": [
+                    (0, 0, {"duration": 4, "unit": "hour", "price": 20.0, "start_time": 8.0, "end_time": 18.0}),
+                    (0, 0, {"duration": 8, "unit": "hour", "price": 40.0, "start_time": 8.0, "end_time": 18.0}),
+                ],
+            }
+        )
+        pricing = self.env["website.rentals.pricing"]
+        periods = [
+            ("2021-09-10 08:00:00", "2021-09-10 12:00:00", 1),
+            ("2021-09-10 08:00:00", "2021-09-10 14:00:00", 2),
+            ("2021-09-10 08:00:00", "2021-09-12 18:00:00", 3),
+        ]
+
+        for (start_date, stop_date, qty), price in zip(periods, pricing.get_prices(product, periods)):
+            wizard = self.env["rental.wizard"].create({
+                "product_id": product.id,
+                "pickup_date": start_date,
+                "return_date": stop_date,
+                "quantity": qty,
+            })
+            wizard._compute_unit_price()
+
+            assert price == wizard.unit_price * qty
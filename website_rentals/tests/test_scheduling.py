@@ -228,3 +228,456 @@ class SchedulingTests(TransactionCase):
 
         # (5 days from now, 10 days from now), after 48 hours security time so should be fine
         assert scheduling.can_rent(self.bicycle, current_time() + datetime.timedelta(days=5), current_time() + datetime.timedelta(days=10), qty=1) == True
+
+    def test_dates_are_utc_for_any_user_timezone(self):
+        scheduling = self.env["website.rentals.scheduling"]
+        now = datetime.datetime.utcnow()
+
+        # The preparation time of 48 hours is checked against UTC, whatever the timezone of the user
+        for timezone in ("UTC", "Pacific/Auckland", "America/Los_Angeles"):
+            self.env.user.tz = timezone
+            assert not scheduling.can_rent(self.bicycle, now + datetime.timedelta(hours=47), now + datetime.timedelta(days=10), qty=1)
+            assert scheduling.can_rent(self.bicycle, now + datetime.timedelta(hours=49), now + datetime.timedelta(days=10), qty=1)
+
+    def test_get_available_qty_with_reservations(self):
+        scheduling = self.env["website.rentals.scheduling"]
+        order = self.env.ref("sale_renting.rental_order_1").copy()
+        order.update(
+            {
+                "order_line": [
+                    (6, 0, []),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.bicycle.id,
+                            "is_rental": True,
+                            "product_uom_qty": 4.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=10),
+                            "return_date": current_time() + datetime.timedelta(days=20),
+                        },
+                    ),
+                ]
+            }
+        )
+        order.action_confirm()
+
+        overlapping = (current_time() + datetime.timedelta(days=5), current_time() + datetime.timedelta(days=15))
+        assert scheduling.get_available_qty(self.bicycle, *overlapping) == 6.0
+        assert scheduling.get_overlapping_reservations(self.bicycle, *overlapping) == order.order_line
+
+        before = (current_time() + datetime.timedelta(days=5), current_time() + datetime.timedelta(days=8))
+        assert scheduling.get_available_qty(self.bicycle, *before) == 10.0
+        assert not scheduling.get_overlapping_reservations(self.bicycle, *before)
+
+    def test_returned_units_are_available(self):
+        scheduling = self.env["website.rentals.scheduling"]
+        order = self.env.ref("sale_renting.rental_order_1").copy()
+        order.update(
+            {
+                "order_line": [
+                    (6, 0, []),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.bicycle.id,
+                            "is_rental": True,
+                            "product_uom_qty": 4.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=10),
+                            "return_date": current_time() + datetime.timedelta(days=20),
+                        },
+                    ),
+                ]
+            }
+        )
+        order.action_confirm()
+        line = order.order_line
+
+        overlapping = (current_time() + datetime.timedelta(days=5), current_time() + datetime.timedelta(days=15))
+        assert scheduling.get_available_qty(self.bicycle, *overlapping) == 6.0
+
+        # Returned early while the order is still open
+        line.write({"qty_delivered": 4.0, "qty_returned": 3.0})
+        assert line.is_active_rental
+        assert scheduling.get_available_qty(self.bicycle, *overlapping) == 9.0
+        assert scheduling.get_available_qtys(self.bicycle, *overlapping) == {self.bicycle.id: 9.0}
+        assert scheduling.get_overlapping_reservations(self.bicycle, *overlapping) == line
+
+        line.write({"qty_returned": 4.0})
+        assert scheduling.get_available_qty(self.bicycle, *overlapping) == 10.0
+        assert scheduling.get_available_qtys(self.bicycle, *overlapping) == {self.bicycle.id: 10.0}
+        assert scheduling.get_quote(self.bicycle, *overlapping)["available_qty"] == 10.0
+        assert not scheduling.get_overlapping_reservations(self.bicycle, *overlapping)
+
+    def test_inverted_periods_are_unavailable(self):
+        scheduling = self.env["website.rentals.scheduling"]
+        order = self.env.ref("sale_renting.rental_order_1").copy()
+        order.update(
+            {
+                "order_line": [
+                    (6, 0, []),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.bicycle.id,
+                            "is_rental": True,
+                            "product_uom_qty": 4.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=10),
+                            "return_date": current_time() + datetime.timedelta(days=20),
+                        },
+                    ),
+                ]
+            }
+        )
+        order.action_confirm()
+
+        # Stops before the reservation starts, starts after it stopped
+        inverted = (current_time() + datetime.timedelta(days=25), current_time() + datetime.timedelta(days=5))
+        assert scheduling.get_available_qty(self.bicycle, *inverted) == 0
+        assert scheduling.get_available_qtys(self.bicycle, *inverted) == {self.bicycle.id: 0}
+        assert not scheduling.can_rent(self.bicycle, *inverted, qty=1)
+        assert not scheduling.can_rent(self.oil_change, *inverted, qty=1)
+
+        quote = scheduling.get_quote(self.bicycle, *inverted)
+        assert quote["available_qty"] == 0
+        assert not quote["can_rent"]
+
+    def test_get_unavailable_lines(self):
+        scheduling = self.env["website.rentals.scheduling"]
+        order = self.env.ref("sale_renting.rental_order_1").copy()
+        order.update(
+            {
+                "order_line": [
+                    (6, 0, []),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.meeting_room.id,
+                            "is_rental": True,
+                            "product_uom_qty": 1.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=2),
+                            "return_date": current_time() + datetime.timedelta(days=4),
+                        },
+                    ),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.bicycle.id,
+                            "is_rental": True,
+                            "product_uom_qty": 2.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=5),
+                            "return_date": current_time() + datetime.timedelta(days=6),
+                        },
+                    ),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.bicycle.id,
+                            "is_rental": True,
+                            "product_uom_qty": 9.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=8),
+                            "return_date": current_time() + datetime.timedelta(days=9),
+                        },
+                    ),
+                ]
+            }
+        )
+
+        # 11 bicycles are ordered in total while there are only 10 in stock
+        assert scheduling.get_unavailable_lines(order.order_line) == order.order_line.filtered(
+            lambda line: line.product_id == self.bicycle
+        )
+        assert not scheduling.get_unavailable_lines(order.order_line[0])
+
+    def test_get_available_qty_from_occupancy_table(self):
+        scheduling = self.env["website.rentals.scheduling"]
+        self.env["ir.config_parameter"].set_param("website_rentals.use_occupancy_table", "True")
+        self.env["website.rentals.occupancy"].rebuild()
+        assert scheduling._use_occupancy_table()
+
+        order = self.env.ref("sale_renting.rental_order_1").copy()
+        order.update(
+            {
+                "order_line": [
+                    (6, 0, []),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.bicycle.id,
+                            "is_rental": True,
+                            "product_uom_qty": 4.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=10),
+                            "return_date": current_time() + datetime.timedelta(days=20),
+                        },
+                    ),
+                ]
+            }
+        )
+        order.action_confirm()
+
+        # The occupancy is refreshed later on, until then the reservations are used
+        jobs = self.env["website.rentals.availability.job"]
+        overlapping = (current_time() + datetime.timedelta(days=5), current_time() + datetime.timedelta(days=15))
+        assert jobs.search_count([("product_id", "=", self.bicycle.id)])
+        assert scheduling.get_available_qty(self.bicycle, *overlapping) == 6.0
+
+        jobs._process(auto_commit=False)
+        assert not jobs.search_count([("product_id", "=", self.bicycle.id)])
+        assert self.env["website.rentals.occupancy"].search_count([("product_id", "=", self.bicycle.id)])
+        assert scheduling.get_available_qty(self.bicycle, *overlapping) == 6.0
+
+        before = (current_time() + datetime.timedelta(days=5), current_time() + datetime.timedelta(days=8))
+        assert scheduling.get_available_qty(self.bicycle, *before) == 10.0
+
+        order.action_cancel()
+        assert scheduling.get_available_qty(self.bicycle, *overlapping) == 10.0
+        jobs._process(auto_commit=False)
+        assert scheduling.get_available_qty(self.bicycle, *overlapping) == 10.0
+
+    def test_occupancy_table_is_outdated_by_bookings_while_disabled(self):
+        scheduling = self.env["website.rentals.scheduling"]
+        config = self.env["ir.config_parameter"]
+        occupancy = self.env["website.rentals.occupancy"]
+
+        # Enabling the table doesn't use it before it has been rebuilt
+        config.set_param("website_rentals.use_occupancy_table", "True")
+        config.set_param("website_rentals.occupancy_rebuilt_at", False)
+        assert not scheduling._use_occupancy_table()
+        occupancy.rebuild()
+        assert scheduling._use_occupancy_table()
+
+        config.set_param("website_rentals.use_occupancy_table", "False")
+        order = self.env.ref("sale_renting.rental_order_1").copy()
+        order.update(
+            {
+                "order_line": [
+                    (6, 0, []),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.bicycle.id,
+                            "is_rental": True,
+                            "product_uom_qty": 4.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=10),
+                            "return_date": current_time() + datetime.timedelta(days=20),
+                        },
+                    ),
+                ]
+            }
+        )
+        order.action_confirm()
+        assert not self.env["website.rentals.availability.job"].search_count([("product_id", "=", self.bicycle.id)])
+
+        # The booking never reached the table, which stays unused until the next rebuild
+        overlapping = (current_time() + datetime.timedelta(days=5), current_time() + datetime.timedelta(days=15))
+        config.set_param("website_rentals.use_occupancy_table", "True")
+        assert not scheduling._use_occupancy_table()
+        assert scheduling.get_available_qty(self.bicycle, *overlapping) == 6.0
+
+        occupancy.rebuild()
+        assert scheduling._use_occupancy_table()
+        assert scheduling.get_available_qty(self.bicycle, *overlapping) == 6.0
+
+    def test_active_rental_follows_order_state(self):
+        scheduling = self.env["website.rentals.scheduling"]
+        order = self.env.ref("sale_renting.rental_order_1").copy()
+        order.update(
+            {
+                "order_line": [
+                    (6, 0, []),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.bicycle.id,
+                            "is_rental": True,
+                            "product_uom_qty": 4.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=10),
+                            "return_date": current_time() + datetime.timedelta(days=20),
+                        },
+                    ),
+                ]
+            }
+        )
+        assert not order.order_line.is_active_rental
+
+        order.action_confirm()
+        assert order.order_line.is_active_rental
+        assert scheduling.get_reservations(self.bicycle) == order.order_line
+
+        order.action_cancel()
+        assert not order.order_line.is_active_rental
+        assert not scheduling.get_reservations(self.bicycle)
+
+    def test_only_reserving_lines_invalidate_availability(self):
+        versions = self.env["website.rentals.availability.version"]
+        order = self.env.ref("sale_renting.rental_order_1").copy()
+        order.order_line.unlink()
+        version = versions._get_version(self.bicycle)
+
+        # Quotation lines don't reserve anything
+        line = self.env["sale.order.line"].create(
+            {
+                "order_id": order.id,
+                "product_id": self.bicycle.id,
+                "is_rental": True,
+                "product_uom_qty": 4.0,
+                "pickup_date": current_time() + datetime.timedelta(days=10),
+                "return_date": current_time() + datetime.timedelta(days=20),
+            }
+        )
+        line.product_uom_qty = 5.0
+        assert versions._get_version(self.bicycle) == version
+
+        order.action_confirm()
+        assert versions._get_version(self.bicycle) > version
+
+        version = versions._get_version(self.bicycle)
+        order.action_cancel()
+        assert versions._get_version(self.bicycle) > version
+
+    def test_get_available_qtys(self):
+        scheduling = self.env["website.rentals.scheduling"]
+        order = self.env.ref("sale_renting.rental_order_1").copy()
+        order.update(
+            {
+                "order_line": [
+                    (6, 0, []),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.bicycle.id,
+                            "is_rental": True,
+                            "product_uom_qty": 4.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=10),
+                            "return_date": current_time() + datetime.timedelta(days=20),
+                        },
+                    ),
+                ]
+            }
+        )
+        order.action_confirm()
+
+        period = (current_time() + datetime.timedelta(days=5), current_time() + datetime.timedelta(days=15))
+        products = self.bicycle | self.meeting_room
+        assert scheduling.get_available_qtys(products, *period) == {
+            self.bicycle.id: 6.0,
+            self.meeting_room.id: 1.0,
+        }
+        assert scheduling.get_available_qtys(products, *period) == {
+            product.id: scheduling.get_available_qty(product, *period) for product in products
+        }
+
+    def test_get_available_templates(self):
+        scheduling = self.env["website.rentals.scheduling"]
+        order = self.env.ref("sale_renting.rental_order_1").copy()
+        order.update(
+            {
+                "order_line": [
+                    (6, 0, []),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.meeting_room.id,
+                            "is_rental": True,
+                            "product_uom_qty": 1.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=10),
+                            "return_date": current_time() + datetime.timedelta(days=20),
+                        },
+                    ),
+                ]
+            }
+        )
+        order.action_confirm()
+
+        templates = (self.meeting_room | self.oil_change | self.bicycle).product_tmpl_id
+        period = (current_time() + datetime.timedelta(days=5), current_time() + datetime.timedelta(days=15))
+
+        # Products that aren't stockable are always available, like in can_rent()
+        assert scheduling.get_available_templates(templates, *period) == (self.oil_change | self.bicycle).product_tmpl_id
+
+    def test_cart_holds_count_against_availability(self):
+        scheduling = self.env["website.rentals.scheduling"]
+        order = self.env.ref("sale_renting.rental_order_1").copy()
+        order.update(
+            {
+                "order_line": [
+                    (6, 0, []),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.bicycle.id,
+                            "is_rental": True,
+                            "product_uom_qty": 4.0,
+                            "pickup_date": current_time() + datetime.timedelta(days=10),
+                            "return_date": current_time() + datetime.timedelta(days=20),
+                            "rental_hold_until": datetime.datetime.now() + datetime.timedelta(minutes=15),
+                        },
+                    ),
+                ]
+            }
+        )
+
+        period = (current_time() + datetime.timedelta(days=5), current_time() + datetime.timedelta(days=15))
+        assert scheduling.get_available_qty(self.bicycle, *period) == 6.0
+
+        order.order_line.rental_hold_until = datetime.datetime.now() - datetime.timedelta(minutes=1)
+        self.env["sale.order.line"]._release_expired_rental_holds()
+        assert not order.order_line.rental_hold_until
+        assert scheduling.get_available_qty(self.bicycle, *period) == 10.0
+
+        # The hold of an order doesn't prevent the order itself from being confirmed
+        order.order_line.write({
+            "product_uom_qty": 10.0,
+            "rental_hold_until": datetime.datetime.now() + datetime.timedelta(minutes=15),
+        })
+        order.action_confirm()
+        assert not order.order_line.rental_hold_until
+        assert scheduling.get_available_qty(self.bicycle, *period) == 0.0
+
+    def test_cart_holds_require_availability(self):
+        self.env["ir.config_parameter"].sudo().set_param("website_rentals.cart_hold_minutes", 15)
+        pickup_date = current_time() + datetime.timedelta(days=10)
+        return_date = current_time() + datetime.timedelta(days=20)
+
+        orders = self.env.ref("sale_renting.rental_order_1").copy() | self.env.ref("sale_renting.rental_order_1").copy()
+        for order in orders:
+            order.update(
+                {
+                    "order_line": [
+                        (6, 0, []),
+                        (
+                            0,
+                            0,
+                            {
+                                "product_id": self.bicycle.id,
+                                "is_rental": True,
+                                "product_uom_qty": 6.0,
+                                "pickup_date": pickup_date,
+                                "return_date": return_date,
+                            },
+                        ),
+                    ]
+                }
+            )
+
+        orders[0].order_line._hold_rental()
+        assert orders[0].order_line.rental_hold_until
+
+        # Only 4 of the 10 bicycles are left, the second cart cannot hold 6
+        orders[1].order_line._hold_rental()
+        assert not orders[1].order_line.rental_hold_until
+
+        orders[1].order_line.product_uom_qty = 4.0
+        orders[1].order_line._hold_rental()
+        assert orders[1].order_line.rental_hold_until
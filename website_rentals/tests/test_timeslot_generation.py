@@ -2,6 +2,7 @@ import datetime
 from freezegun import freeze_time
 from unittest import mock
 from odoo.tests import TransactionCase
+from odoo.addons.website_rentals import helpers
 
 
 class TimeslotGenerationTests(TransactionCase):
@@ -10,6 +11,9 @@ class TimeslotGenerationTests(TransactionCase):
 
         self.scheduling = self.env["website.rentals.scheduling"]
 
+        # Timeslots are generated in the timezone of the user
+        self.env.user.tz = "UTC"
+
         # product sample data
         self.blank_product = self.env["product.product"].create(
             {
@@ -228,6 +232,28 @@ class TimeslotGenerationTests(TransactionCase):
             "18:00",
         ]
 
+    @freeze_time("2021-09-10 06:00:00")
+    def test_timeslots_with_quantities(self):
+        day = datetime.datetime(2021, 9, 11)
+        timeline = helpers.occupancy.OccupancyTimeline([
+            (day.replace(hour=8), day.replace(hour=12), 1),
+            (day.replace(hour=12), day.replace(hour=18), 2),
+        ])
+
+        with mock.patch.object(type(self.scheduling), "_get_total_units", return_value=3), \
+                mock.patch.object(type(self.scheduling), "_get_occupancy_timeline", return_value=timeline):
+            timeslots = self.meeting_room.get_rental_hourly_timeslots(day, with_quantities=True)
+
+            assert timeslots["start"] == ["08:00", "12:00", "16:00"]
+            assert timeslots["start_qty"] == {"08:00": 2, "12:00": 1, "16:00": 1}
+            assert timeslots["stop_qty"] == {
+                "12:00": 2, "13:00": 1, "14:00": 1, "15:00": 1, "16:00": 1, "17:00": 1, "18:00": 1,
+            }
+
+            # Filtering on the quantities gives the timeslots for that quantity
+            timeslots = self.meeting_room.get_rental_hourly_timeslots(day, quantity=2)
+            assert timeslots == {"start": ["08:00"], "stop": ["12:00"]}
+
     @freeze_time("2021-09-10 11:30:00")
     def test_timeslots_should_only_generate_after_current_time(self):
         timeslots = self.meeting_room.get_rental_hourly_timeslots(
@@ -235,3 +261,69 @@ class TimeslotGenerationTests(TransactionCase):
         )
         assert timeslots["start"] == ["12:00", "16:00"]
         assert timeslots["stop"] == ["16:00", "17:00", "18:00"]
+
+    def test_availability_calendar(self):
+        tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+        day_after_tomorrow = tomorrow + datetime.timedelta(days=1)
+        calendar = self.meeting_room.get_rental_availability_calendar(
+            tomorrow, day_after_tomorrow, quantity=0
+        )
+
+        assert list(calendar) == [
+            tomorrow.strftime("%Y-%m-%d"),
+            day_after_tomorrow.strftime("%Y-%m-%d"),
+        ]
+        assert calendar[tomorrow.strftime("%Y-%m-%d")]["start_timeslots"] == 3
+        assert calendar[tomorrow.strftime("%Y-%m-%d")]["stop_timeslots"] == 7
+        assert calendar[tomorrow.strftime("%Y-%m-%d")]["available_qty"] == 0
+
+    @freeze_time("2021-09-10 06:30:00")
+    def test_find_next_available(self):
+        periods = self.meeting_room.find_next_available_rental(4, qty=0, limit=3)
+        assert periods == [
+            (datetime.datetime(2021, 9, 10, 8), datetime.datetime(2021, 9, 10, 12)),
+            (datetime.datetime(2021, 9, 10, 12), datetime.datetime(2021, 9, 10, 16)),
+            (datetime.datetime(2021, 9, 11, 8), datetime.datetime(2021, 9, 11, 12)),
+        ]
+
+        periods = self.meeting_room.find_next_available_rental(20, qty=0)
+        assert periods == [(datetime.datetime(2021, 9, 10, 12), datetime.datetime(2021, 9, 11, 8))]
+
+        # There is no stock of the meeting room
+        assert not self.meeting_room.find_next_available_rental(4, qty=1)
+        assert not self.days_only_product.find_next_available_rental(4)
+
+    @freeze_time("2021-09-10 06:30:00")
+    def test_timeslots_follow_user_timezone(self):
+        # 06:30 UTC is 08:30 in Brussels, so the 08:00 slot has passed there
+        self.env.user.tz = "Europe/Brussels"
+        timeslots = self.meeting_room.get_rental_hourly_timeslots(datetime.datetime.now())
+        assert timeslots["start"] == ["12:00", "16:00"]
+
+        # The browser timezone is only used when the user has none
+        timeslots = self.meeting_room.get_rental_hourly_timeslots(datetime.datetime.now(), timezone="UTC")
+        assert timeslots["start"] == ["12:00", "16:00"]
+
+        self.env.user.tz = False
+        timeslots = self.meeting_room.get_rental_hourly_timeslots(datetime.datetime.now(), timezone="UTC")
+        assert timeslots["start"] == ["08:00", "12:00", "16:00"]
+
+    def test_product_profile_follows_pricing_rules(self):
+        profile = self.scheduling.get_product_profile(self.meeting_room)
+        assert profile["hourly_rule"]["duration"] == 4
+        assert len(profile["pricing_rules"]) == 2
+        assert self.meeting_room.shortest_price_rule().duration == 4
+
+        self.meeting_room.write({
+            "preparation_time": 2.0,
+            "rental_pricing_ids": [(0, 0, {"duration": 2, "unit": "hour", "price": 15.0, "start_time": 8.0, "end_time": 18.0})],
+        })
+        profile = self.scheduling.get_product_profile(self.meeting_room)
+        assert profile["hourly_rule"]["duration"] == 2
+        assert profile["preparation_time"] == 2.0
+
+        self.meeting_room.rental_pricing_ids.filtered(lambda rule: rule.duration == 2).unlink()
+        assert self.scheduling.get_product_profile(self.meeting_room)["hourly_rule"]["duration"] == 4
+
+        assert not self.scheduling.get_product_profile(self.days_only_product)["hourly_rule"]
+        assert not self.days_only_product.shortest_price_rule()